@@ -0,0 +1,52 @@
+# Compare a benchmark result file against a saved baseline.
+# python -m benchmarks.compare results.json baseline.json --tolerance 0.15
+
+from typing import Dict, List
+import argparse
+import json
+import sys
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.15) -> List[Dict]:
+    """
+    Relative change of every metric present in both files. A metric regresses
+    when it moves in its bad direction by more than `tolerance` (0.15 = 15%).
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / abs(base["value"])
+        worse = -change if cur["higher_is_better"] else change
+        rows.append({
+            "name": name,
+            "unit": cur["unit"],
+            "baseline": base["value"],
+            "current": cur["value"],
+            "change": change,
+            "regression": worse > tolerance,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict]) -> None:
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['name']:<48} {r['baseline']:>12.4g} -> {r['current']:>12.4g} {r['unit']:<10} {r['change']:+7.1%} {flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare benchmark results against a baseline.")
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(current, baseline, args.tolerance)
+    print_comparison(rows)
+    sys.exit(1 if any(r["regression"] for r in rows) else 0)
@@ -0,0 +1,62 @@
+# Benchmark corpora: HotpotQA-shaped entries, either synthetic or sampled from a split.
+
+from typing import Dict, List, Optional
+from itertools import islice
+import random
+
+
+_WORDS = (
+    "river mountain album film director actor band city county season novel author "
+    "school station bridge church museum company founder league team village island "
+    "singer producer river battle province railway magazine painter composer studio"
+).split()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def synthetic_entries(
+    num_titles: int,
+    sentences_per_title: int = 4,
+    titles_per_question: int = 2,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Entries with the HotpotQA fields the pipeline and indexer use. Each
+    question draws its context from `titles_per_question` random titles and
+    names the first sentence of each as a supporting fact.
+    """
+    rng = random.Random(seed)
+    paragraphs = [
+        [f"Title {i}", [_sentence(rng, rng.randint(8, 20)) for _ in range(sentences_per_title)]]
+        for i in range(num_titles)
+    ]
+    entries = []
+    for q in range(max(1, num_titles // titles_per_question)):
+        context = rng.sample(paragraphs, min(titles_per_question, num_titles))
+        entries.append({
+            "_id": f"synthetic-{q}",
+            "question": " ".join(s[1][0].rstrip(".") for s in context) + "?",
+            "answer": context[0][0],
+            "supporting_facts": [[title, 0] for title, _ in context],
+            "type": "bridge",
+            "level": "medium",
+            "context": context,
+        })
+    return entries
+
+
+def sampled_entries(path: str, num_questions: int, seed: Optional[int] = 0) -> List[Dict]:
+    """First `num_questions` entries of a HotpotQA split, or a random sample when seed is set."""
+    from qa_system.data import HotpotQADataset
+
+    dataset = HotpotQADataset(path)
+    if seed is None:
+        return list(islice(dataset.iter_raw(), num_questions))
+    rows = set(random.Random(seed).sample(range(len(dataset)), min(num_questions, len(dataset))))
+    return [entry for row, entry in enumerate(dataset.iter_raw()) if row in rows]
+
+
+def count_sentences(entries: List[Dict]) -> int:
+    return sum(len(sentences) for entry in entries for _, sentences in entry["context"])
@@ -0,0 +1,86 @@
+# Index size, query latency and supporting-fact recall for each index build option.
+#
+#   python -m benchmarks.index_options --dataset qa_system/data/hotpot_dev_fullwiki_v1.json --questions 300
+#
+# Every variant indexes the same entries; recall@k is the fraction of each
+# question's gold [title, sent_id] facts found in its top-k retrieved sentences.
+
+from typing import Dict, List
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import tempfile
+import numpy as np
+
+from benchmarks.corpus import sampled_entries, synthetic_entries
+from benchmarks.run import Results, _latencies
+
+
+VARIANTS: Dict[str, Dict] = {
+    "baseline": {},
+    "nbits2": {"nbits": 2},
+    "nbits8": {"nbits": 8},
+    "stopwords": {"prune_stopwords": True},
+    "pool2": {"pool_factor": 2},
+    "low_norm10": {"low_norm_quantile": 0.1},
+}
+
+
+def _dir_size_mb(path: str) -> float:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+    return total / 2**20
+
+
+def _sp_recall(retriever, entries: List[Dict], k: int) -> float:
+    from qa_system.data.metrics import sp_scores
+
+    recalls = []
+    for entry in entries:
+        docs = retriever.retrieve(entry["question"], top_k=k)
+        pred_sp = retriever.document_table.lookup_sp(docs.doc_ids)
+        recalls.append(sp_scores(pred_sp, entry["supporting_facts"])[3])
+    return float(np.mean(recalls))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare index build options.")
+    parser.add_argument("--out", default="index_options.json")
+    parser.add_argument("--dataset", help="HotpotQA split to sample (default: synthetic corpus)")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=list(VARIANTS))
+    args = parser.parse_args()
+
+    from qa_system.utils import Settings
+    from qa_system.retrieval import IndexBuildOptions, Retriever
+    from qa_system.retrieval.indexer import build_index, default_build_options
+
+    entries = sampled_entries(args.dataset, args.questions) if args.dataset else synthetic_entries(args.questions * 2)
+    results = Results()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.variants:
+            cfg = Settings().model_copy(update={"index_folder": workdir, "index_name": name})
+            options = IndexBuildOptions(**{**default_build_options(cfg).model_dump(), **VARIANTS[name]})
+            manifest = build_index(entries, cfg=cfg, options=options)
+            retriever = Retriever(cfg=cfg)
+
+            results.add(f"index.{name}.size_mb", _dir_size_mb(retriever.store.version_dir(manifest.version)), "MiB", False)
+            question = entries[0]["question"]
+            results.add_latency(f"index.{name}.query", _latencies(lambda: retriever.retrieve(question, top_k=args.k), args.repeat))
+            results.add(f"index.{name}.sp_recall_at_{args.k}", _sp_recall(retriever, entries, args.k), "recall", True)
+            del retriever
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "meta": {"created_at": datetime.now(timezone.utc).isoformat(), "args": vars(args)},
+            "results": results.results,
+        }, f, indent=2)
+    print(f"[bench] Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Prompt-eval (prefill) time with a warm vs cold prompt cache, against a live Ollama.
+#
+#   ollama serve &
+#   python -m benchmarks.prompt_cache --out prompt_cache.json
+#
+# Cold requests put a unique line in front of the system prompt so no cached
+# prefix can match; warm requests reuse the exact system prompt of the previous
+# request, which is what LLM / QueryRewriter send in production.
+
+from typing import Dict, List
+from datetime import datetime, timezone
+import argparse
+import json
+import uuid
+import numpy as np
+
+from benchmarks.corpus import synthetic_entries
+from benchmarks.run import Results
+
+
+def _prefill(client, model: str, messages: List[Dict]) -> Dict:
+    response = client.chat(model=model, messages=messages, think=False, options={"num_predict": 1, "temperature": 0})
+    return {
+        "ms": (response.get("prompt_eval_duration") or 0) / 1e6,
+        "tokens": response.get("prompt_eval_count") or 0,
+    }
+
+
+def _measure(results: Results, client, model: str, name: str, requests: List[List[Dict]]) -> None:
+    cold, warm = [], []
+    for messages in requests:
+        busted = [dict(messages[0], content=f"Request {uuid.uuid4()}\n" + messages[0]["content"])] + messages[1:]
+        cold.append(_prefill(client, model, busted))
+    _prefill(client, model, requests[0])  # prime the cache with the real system prompt
+    for messages in requests:
+        warm.append(_prefill(client, model, messages))
+
+    for label, runs in (("cold", cold), ("warm", warm)):
+        ms = np.array([r["ms"] for r in runs])
+        results.add(f"prompt_cache.{name}.{label}.prefill_p50_ms", np.percentile(ms, 50), "ms", False)
+        results.add(f"prompt_cache.{name}.{label}.prefill_tokens", np.mean([r["tokens"] for r in runs]), "tokens", False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Warm vs cold prompt-cache prefill benchmark (needs `ollama serve`).")
+    parser.add_argument("--out", default="prompt_cache.json")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--contexts", type=int, default=10, help="retrieved sentences per LLM prompt")
+    args = parser.parse_args()
+
+    import ollama
+    from qa_system.llm import LLM
+    from qa_system.query_rewriter.rewriter import QueryRewriter
+
+    client = ollama.Client()
+    llm, rewriter = LLM(), QueryRewriter()
+    entries = synthetic_entries(args.requests * 2)[:args.requests]
+
+    def contexts(entry: Dict) -> List[str]:
+        return [f"{title}: {s}" for title, sentences in entry["context"] for s in sentences][:args.contexts]
+
+    results = Results()
+    _measure(results, client, llm.model_name, "llm",
+             [llm.build_messages(e["question"], contexts(e)) for e in entries])
+    _measure(results, client, rewriter.model_name, "rewriter",
+             [rewriter.build_messages(e["question"]) for e in entries])
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "meta": {"created_at": datetime.now(timezone.utc).isoformat(), "args": vars(args)},
+            "results": results.results,
+        }, f, indent=2)
+    print(f"[bench] Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Offline, CPU-only performance benchmarks for each pipeline stage.
+#
+# From the project root (models must already be in the local HF cache):
+#   python -m benchmarks.run --out bench.json
+#   python -m benchmarks.run --out bench.json --baseline benchmarks/baseline.json
+#
+# A small PLAID index is built per corpus size from a synthetic corpus (or a
+# sample of a HotpotQA split with --dataset), and a stub Ollama server answers
+# the rewriter and LLM calls, so only our own code is measured.
+
+from typing import Callable, Dict, List
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+
+from benchmarks.compare import compare, print_comparison
+from benchmarks.corpus import count_sentences, sampled_entries, synthetic_entries
+from benchmarks.stub_ollama import stub_ollama
+
+
+def _latencies(fn: Callable[[], object], repeat: int, warmup: int = 1) -> np.ndarray:
+    for _ in range(warmup):
+        fn()
+    out = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        out[i] = time.perf_counter() - start
+    return out
+
+
+class Results:
+    def __init__(self) -> None:
+        self.results: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, higher_is_better: bool) -> None:
+        self.results[name] = {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+        print(f"[bench] {name:<48} {value:>12.4g} {unit}")
+
+    def add_latency(self, name: str, seconds: np.ndarray) -> None:
+        self.add(f"{name}.p50_ms", np.percentile(seconds, 50) * 1e3, "ms", False)
+        self.add(f"{name}.p99_ms", np.percentile(seconds, 99) * 1e3, "ms", False)
+
+
+def bench_query_encode(results: Results, model, queries: List[str], repeat: int) -> None:
+    """ColBERT query encoding throughput at batch size 1 and full batch."""
+    for batch in (1, len(queries)):
+        seconds = _latencies(lambda: model.encode(queries[:batch], is_query=True, show_progress_bar=False), repeat)
+        results.add(f"encode.batch{batch}.queries_per_s", batch / np.median(seconds), "queries/s", True)
+
+
+def bench_plaid_search(results: Results, retriever, queries: List[str], ks: List[int], size: int, repeat: int) -> None:
+    """PLAID search latency for pre-encoded queries, per k."""
+    with retriever._acquire() as handle:
+        embeddings = handle.model.encode(queries[:1], is_query=True, show_progress_bar=False)
+        for k in ks:
+            seconds = _latencies(lambda: handle.retriever.retrieve(queries_embeddings=embeddings, k=k), repeat)
+            results.add_latency(f"plaid.docs{size}.k{k}", seconds)
+
+
+def bench_rerank(results: Results, reranker, question: str, docs, batch_sizes: List[int], repeat: int) -> None:
+    """Cross-encoder throughput over one question's candidates, per batch size."""
+    for batch_size in batch_sizes:
+        reranker.batch_size = batch_size
+        seconds = _latencies(lambda: reranker.rerank(question, docs, top_k=len(docs)), repeat)
+        results.add(f"rerank.batch{batch_size}.pairs_per_s", len(docs) / np.median(seconds), "pairs/s", True)
+
+
+def bench_rerank_workers(results: Results, reranker, pools: Dict, question: str, docs, repeat: int) -> None:
+    """Cross-encoder pairs/s per worker count; pools share the reranker's weights."""
+    pairs = [(question, t) for t in docs.texts.tolist()]
+    baseline = None
+    for workers in sorted({1, *pools}):
+        score = (lambda: reranker._score_pairs(pairs)) if workers == 1 else (lambda p=pools[workers]: p.score(pairs, reranker.batch_size))
+        pairs_per_s = len(pairs) / np.median(_latencies(score, repeat))
+        baseline = baseline or pairs_per_s
+        results.add(f"rerank.workers{workers}.pairs_per_s", pairs_per_s, "pairs/s", True)
+        results.add(f"rerank.workers{workers}.speedup", pairs_per_s / baseline, "x", True)
+
+
+def bench_document_store(results: Results, retriever, repeat: int) -> None:
+    """doc_id -> text and doc_id -> [title, sent_id] lookups for a 100-id batch."""
+    doc_ids = list(retriever.document_ids_to_sentence)[:100]
+    seconds = _latencies(lambda: [retriever.document_ids_to_sentence.get(d) for d in doc_ids], repeat)
+    results.add_latency("docstore.text.batch100", seconds)
+    if retriever.document_table is not None:
+        seconds = _latencies(lambda: retriever.document_table.lookup_sp(doc_ids), repeat)
+        results.add_latency("docstore.sp.batch100", seconds)
+
+
+def bench_end_to_end(results: Results, pipeline, questions: List[str], name: str) -> None:
+    seconds = np.array([_latencies(lambda q=q: pipeline.answer_question(q), 1, warmup=0)[0] for q in questions])
+    results.add_latency(f"pipeline.{name}", seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline CPU benchmarks for the QA pipeline stages.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against this results file and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--dataset", help="sample entries from this HotpotQA split instead of a synthetic corpus")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[250, 1000], help="titles (synthetic) or questions (--dataset) per index")
+    parser.add_argument("--ks", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32])
+    parser.add_argument("--rerank-workers", type=int, nargs="+", default=[1, 2, 4], help="reranker worker processes to compare")
+    parser.add_argument("--questions", type=int, default=20, help="questions for end-to-end latency")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="seconds the stub Ollama waits per call")
+    parser.add_argument("--colbert-model", help="defaults to Settings().model_name")
+    parser.add_argument("--reranker-model", help="defaults to Settings().reranker_model_name")
+    parser.add_argument("--threads", type=int, help="torch.set_num_threads")
+    parser.add_argument("--online", action="store_true", help="allow downloading models from the HF hub")
+    args = parser.parse_args()
+
+    if not args.online:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    results = Results()
+    with stub_ollama(delay=args.llm_delay), tempfile.TemporaryDirectory() as workdir:
+        # imported here so that ollama picks up the stub's OLLAMA_HOST
+        import torch
+        from qa_system.utils import Settings
+        from qa_system.retrieval import Retriever
+        from qa_system.retrieval.indexer import build_index
+        from qa_system.reranker import Reranker
+        from qa_system.reranker.pool import RerankerPool
+        from qa_system.llm import LLM
+        from qa_system.query_rewriter.rewriter import QueryRewriter
+        from qa_system.pipeline import QAPipeline
+
+        if args.threads:
+            torch.set_num_threads(args.threads)
+        base = Settings()
+        reranker = Reranker(model_name=args.reranker_model, device="cpu", fp16=False)
+        # fork the worker pools before the parent runs any torch inference
+        pools = {n: RerankerPool(reranker.reranker, n) for n in args.rerank_workers if n > 1}
+
+        retriever, entries = None, []
+        for size in sorted(args.corpus_sizes):
+            entries = sampled_entries(args.dataset, size) if args.dataset else synthetic_entries(size)
+            cfg = base.model_copy(update={
+                "index_folder": workdir,
+                "index_name": f"bench-{size}",
+                "model_name": args.colbert_model or base.model_name,
+            })
+            build_index(entries, cfg=cfg)
+            retriever = Retriever(cfg=cfg)
+            queries = [e["question"] for e in entries[:args.questions]]
+            bench_plaid_search(results, retriever, queries, args.ks, count_sentences(entries), args.repeat)
+
+        # everything below runs against the largest index
+        bench_query_encode(results, retriever.model, queries, args.repeat)
+        bench_document_store(results, retriever, args.repeat)
+        docs = retriever.retrieve(queries[0], top_k=base.retrieval_top_k * 4)
+        bench_rerank(results, reranker, queries[0], docs, args.batch_sizes, max(3, args.repeat // 4))
+        reranker.batch_size = Settings().reranker_batch_size
+        bench_rerank_workers(results, reranker, pools, queries[0], docs, max(3, args.repeat // 4))
+        for pool in pools.values():
+            pool.close()
+
+        bench_end_to_end(results, QAPipeline(retriever=retriever, reranker=reranker, llm=LLM()), queries, "no_rewriter")
+        bench_end_to_end(results, QAPipeline(retriever=retriever, reranker=reranker, llm=LLM(), query_rewriter=QueryRewriter()), queries, "full")
+
+        meta = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "torch_threads": torch.get_num_threads(),
+            "args": vars(args),
+        }
+
+    output = {"meta": meta, "results": results.results}
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"[bench] Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(output, baseline, args.tolerance)
+        print_comparison(rows)
+        if any(r["regression"] for r in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
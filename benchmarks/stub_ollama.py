@@ -0,0 +1,70 @@
+# Minimal stand-in for `ollama serve` so the pipeline can be benchmarked offline.
+# Only /api/chat is implemented; replies are canned and returned after a fixed delay.
+
+from typing import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+
+
+REWRITE_REPLY = {"sub_queries": ["Who is the first entity?", "Who is the second entity?"]}
+ANSWER_REPLY = "INSUFFICIENT EVIDENCE"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+        time.sleep(self.delay)
+        # structured (format=...) requests come from the rewriter
+        content = json.dumps(REWRITE_REPLY) if body.get("format") else ANSWER_REPLY
+        reply = {
+            "model": body.get("model", ""),
+            "created_at": "1970-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": 0,
+            "eval_count": len(content.split()),
+        }
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@contextmanager
+def stub_ollama(delay: float = 0.0) -> Iterator[str]:
+    """
+    Serve the stub on a free local port and point OLLAMA_HOST at it.
+
+    Must be entered before `ollama` is first imported, since the client reads
+    OLLAMA_HOST at import time.
+    """
+    handler = type("Handler", (_Handler,), {"delay": delay})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    previous = os.environ.get("OLLAMA_HOST")
+    os.environ["OLLAMA_HOST"] = host
+    try:
+        yield host
+    finally:
+        server.shutdown()
+        if previous is None:
+            os.environ.pop("OLLAMA_HOST", None)
+        else:
+            os.environ["OLLAMA_HOST"] = previous
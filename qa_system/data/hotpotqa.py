@@ -1,9 +1,174 @@
+from typing import Dict, Iterator, List, Optional, Union
+from array import array
+from pathlib import Path
+import json
+import os
+import random
+import numpy as np
+
+
+# fields kept in the preprocessed cache; `context` is only read by streaming the source
+CACHE_FIELDS = ("_id", "question", "answer", "supporting_facts", "type", "level")
+
+
+def iter_json_records(path: Union[str, Path], chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """
+    Stream records from a top-level JSON array or a JSONL file without
+    loading the whole file, decoding one object at a time.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        while True:
+            # skip separators between records
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,[":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+            if pos >= len(buf) or buf[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield record
+            pos = end
+            # keep the buffer bounded to roughly one chunk plus one record
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
 
 
 class HotpotQADataset:
-    def __init__(self) -> None:
-        pass
+    """
+    Streaming view over a HotpotQA split (JSON array or JSONL).
+
+    On first use the split is streamed once into a compact cache next to it
+    (`<file>.cache/`): one JSON line per question with only the fields in
+    CACHE_FIELDS, plus an int64 offset table and a sorted `_id` -> row index.
+    Iteration, indexing and lookup by `_id` (binary search over the memory-
+    mapped index) then read single lines from the cache, so memory does not
+    grow with the size of the split. Use `iter_raw()` when the paragraphs are needed.
+    """
+
+    def __init__(self, path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Dataset not found at {self.path}")
+        self.cache_dir = Path(cache_dir) if cache_dir else self.path.with_name(self.path.name + ".cache")
+        self._records_path = self.cache_dir / "records.jsonl"
+        self._offsets_path = self.cache_dir / "offsets.bin"
+        self._meta_path = self.cache_dir / "meta.json"
+        self._ids_path = self.cache_dir / "sorted_ids.npy"
+        self._rows_path = self.cache_dir / "sorted_rows.npy"
+        self._offsets: Optional[array] = None
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._sorted_rows: Optional[np.ndarray] = None
+
+    # ---- cache ----
+
+    def _source_signature(self) -> Dict:
+        stat = os.stat(self.path)
+        return {"source_size": stat.st_size, "source_mtime": stat.st_mtime}
+
+    def _cache_is_fresh(self) -> bool:
+        paths = (self._meta_path, self._records_path, self._offsets_path, self._ids_path, self._rows_path)
+        if not all(p.exists() for p in paths):
+            return False
+        with open(self._meta_path, "r") as f:
+            meta = json.load(f)
+        return {k: meta.get(k) for k in ("source_size", "source_mtime")} == self._source_signature()
+
+    def build_cache(self) -> None:
+        """Stream the source split once and write the preprocessed cache."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        offsets = array("q")
+        ids: List[bytes] = []
+        tmp_records = self._records_path.with_suffix(".tmp")
+        with open(tmp_records, "wb") as out:
+            for entry in iter_json_records(self.path):
+                offsets.append(out.tell())
+                ids.append(str(entry["_id"]).encode("utf-8"))
+                record = {k: entry[k] for k in CACHE_FIELDS if k in entry}
+                out.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        tmp_offsets = self._offsets_path.with_suffix(".tmp")
+        with open(tmp_offsets, "wb") as out:
+            offsets.tofile(out)
+        ids = np.array(ids, dtype=bytes) if ids else np.empty(0, dtype="S1")
+        order = np.argsort(ids, kind="stable")
+        np.save(self._ids_path, ids[order])
+        np.save(self._rows_path, order.astype(np.int64))
+        os.replace(tmp_records, self._records_path)
+        os.replace(tmp_offsets, self._offsets_path)
+        with open(self._meta_path, "w") as f:
+            json.dump({**self._source_signature(), "count": len(offsets)}, f)
+        print(f"[HotpotQADataset] Cached {len(offsets)} questions to {self.cache_dir}")
+
+    def _ensure_cache(self) -> array:
+        if self._offsets is None:
+            if not self._cache_is_fresh():
+                self.build_cache()
+            offsets = array("q")
+            with open(self._offsets_path, "rb") as f:
+                offsets.frombytes(f.read())
+            self._offsets = offsets
+        return self._offsets
+
+    def _read_rows(self, rows: List[int]) -> List[Dict]:
+        offsets = self._ensure_cache()
+        records = []
+        with open(self._records_path, "rb") as f:
+            for row in rows:
+                f.seek(offsets[row])
+                records.append(json.loads(f.readline()))
+        return records
+
+    # ---- access ----
+
+    def __len__(self) -> int:
+        return len(self._ensure_cache())
+
+    def __iter__(self) -> Iterator[Dict]:
+        self._ensure_cache()
+        with open(self._records_path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        n = len(self)
+        if isinstance(key, slice):
+            return self._read_rows(list(range(n))[key])
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError(key)
+        return self._read_rows([key])[0]
+
+    def get(self, qid: str) -> Optional[Dict]:
+        """Look up a question by its HotpotQA `_id`."""
+        if self._sorted_ids is None:
+            self._ensure_cache()
+            self._sorted_ids = np.load(self._ids_path, mmap_mode="r")
+            self._sorted_rows = np.load(self._rows_path, mmap_mode="r")
+        key = str(qid).encode("utf-8")
+        if len(key) > self._sorted_ids.dtype.itemsize:  # longer than any cached id
+            return None
+        i = int(np.searchsorted(self._sorted_ids, key))
+        if i >= len(self._sorted_ids) or self._sorted_ids[i] != key:
+            return None
+        return self._read_rows([int(self._sorted_rows[i])])[0]
 
-    
+    def sample(self, rng: Optional[random.Random] = None) -> Dict:
+        """Pick one random question without reading the rest of the split."""
+        return self[(rng or random).randrange(len(self))]
 
-    
+    def iter_raw(self) -> Iterator[Dict]:
+        """Stream full entries, including `context`, from the source split."""
+        return iter_json_records(self.path)
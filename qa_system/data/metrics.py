@@ -0,0 +1,161 @@
+"""
+HotpotQA answer / supporting-fact metrics.
+
+Same numbers as the official hotpot_evaluate_v1.py, but with the normalization
+precompiled and a batch API that returns per-example arrays, so large eval
+sweeps can score thousands of predictions at once and bootstrap confidence
+intervals from the arrays.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import Counter
+from functools import lru_cache
+import re
+import string
+import numpy as np
+
+
+_ARTICLES = re.compile(r'\b(a|an|the)\b')
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+_SPECIAL = frozenset(['yes', 'no', 'noanswer'])
+
+ANSWER_KEYS = ('em', 'f1', 'prec', 'recall')
+SP_KEYS = ('sp_em', 'sp_f1', 'sp_prec', 'sp_recall')
+JOINT_KEYS = ('joint_em', 'joint_f1', 'joint_prec', 'joint_recall')
+METRIC_KEYS = ANSWER_KEYS + SP_KEYS + JOINT_KEYS
+
+
+@lru_cache(maxsize=1 << 16)
+def normalize_answer(s: str) -> str:
+    """Lower text and remove punctuation, articles and extra whitespace."""
+    return ' '.join(_ARTICLES.sub(' ', s.lower().translate(_PUNCT_TABLE)).split())
+
+
+def _answer_scores(normalized_prediction: str, normalized_ground_truth: str) -> Tuple[float, float, float, float]:
+    """(em, f1, precision, recall) for already-normalized strings."""
+    em = float(normalized_prediction == normalized_ground_truth)
+    if em == 0.0 and (normalized_prediction in _SPECIAL or normalized_ground_truth in _SPECIAL):
+        return em, 0.0, 0.0, 0.0
+
+    prediction_tokens = normalized_prediction.split()
+    ground_truth_tokens = normalized_ground_truth.split()
+    common = Counter(prediction_tokens) & Counter(ground_truth_tokens)
+    num_same = sum(common.values())
+    if num_same == 0:
+        return em, 0.0, 0.0, 0.0
+    precision = 1.0 * num_same / len(prediction_tokens)
+    recall = 1.0 * num_same / len(ground_truth_tokens)
+    f1 = (2 * precision * recall) / (precision + recall)
+    return em, f1, precision, recall
+
+
+def f1_score(prediction: str, ground_truth: str) -> Tuple[float, float, float]:
+    _, f1, prec, recall = _answer_scores(normalize_answer(prediction), normalize_answer(ground_truth))
+    return f1, prec, recall
+
+
+def exact_match_score(prediction: str, ground_truth: str) -> bool:
+    return normalize_answer(prediction) == normalize_answer(ground_truth)
+
+
+def sp_scores(prediction: Sequence, gold: Sequence) -> Tuple[float, float, float, float]:
+    """(em, f1, precision, recall) over sets of [title, sent_id] facts."""
+    cur_sp_pred = set(map(tuple, prediction))
+    gold_sp_pred = set(map(tuple, gold))
+    tp = len(cur_sp_pred & gold_sp_pred)
+    fp = len(cur_sp_pred) - tp
+    fn = len(gold_sp_pred) - tp
+    prec = 1.0 * tp / (tp + fp) if tp + fp > 0 else 0.0
+    recall = 1.0 * tp / (tp + fn) if tp + fn > 0 else 0.0
+    f1 = 2 * prec * recall / (prec + recall) if prec + recall > 0 else 0.0
+    em = 1.0 if fp + fn == 0 else 0.0
+    return em, f1, prec, recall
+
+
+def score_answers(predictions: Sequence[str], golds: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Per-example em/f1/prec/recall arrays for aligned prediction and gold answers."""
+    out = np.array([
+        _answer_scores(normalize_answer(p), normalize_answer(g))
+        for p, g in zip(predictions, golds)
+    ], dtype=np.float64).reshape(-1, 4)
+    return {k: out[:, i] for i, k in enumerate(ANSWER_KEYS)}
+
+
+def score_sp(predictions: Sequence[Sequence], golds: Sequence[Sequence]) -> Dict[str, np.ndarray]:
+    """Per-example sp_em/sp_f1/sp_prec/sp_recall arrays."""
+    out = np.array([sp_scores(p, g) for p, g in zip(predictions, golds)], dtype=np.float64).reshape(-1, 4)
+    return {k: out[:, i] for i, k in enumerate(SP_KEYS)}
+
+
+def score_examples(prediction: Dict, gold: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Per-example metric arrays (one entry per gold example) in the official
+    prediction format: {'answer': {_id: str}, 'sp': {_id: [[title, sent_id], ...]}}.
+
+    Missing answers or sp facts score 0 and exclude the example from the
+    joint metrics, as in the official script.
+    """
+    n = len(gold)
+    answers = prediction.get('answer', {})
+    sps = prediction.get('sp', {})
+    has_answer = np.array([dp['_id'] in answers for dp in gold], dtype=bool)
+    has_sp = np.array([dp['_id'] in sps for dp in gold], dtype=bool)
+    for dp, a, s in zip(gold, has_answer, has_sp):
+        if not a:
+            print('missing answer {}'.format(dp['_id']))
+        if not s:
+            print('missing sp fact {}'.format(dp['_id']))
+
+    metrics = {k: np.zeros(n, dtype=np.float64) for k in METRIC_KEYS}
+
+    idx = np.flatnonzero(has_answer)
+    scored = score_answers([answers[gold[i]['_id']] for i in idx], [gold[i]['answer'] for i in idx])
+    for k in ANSWER_KEYS:
+        metrics[k][idx] = scored[k]
+
+    idx = np.flatnonzero(has_sp)
+    scored = score_sp([sps[gold[i]['_id']] for i in idx], [gold[i]['supporting_facts'] for i in idx])
+    for k in SP_KEYS:
+        metrics[k][idx] = scored[k]
+
+    joint = has_answer & has_sp
+    joint_prec = metrics['prec'] * metrics['sp_prec']
+    joint_recall = metrics['recall'] * metrics['sp_recall']
+    denom = joint_prec + joint_recall
+    joint_f1 = np.divide(2 * joint_prec * joint_recall, denom, out=np.zeros(n), where=denom > 0)
+    metrics['joint_em'] = np.where(joint, metrics['em'] * metrics['sp_em'], 0.0)
+    metrics['joint_f1'] = np.where(joint, joint_f1, 0.0)
+    metrics['joint_prec'] = np.where(joint, joint_prec, 0.0)
+    metrics['joint_recall'] = np.where(joint, joint_recall, 0.0)
+    return metrics
+
+
+def aggregate(per_example: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """Mean of every per-example metric array."""
+    return {k: float(v.mean()) if len(v) else 0.0 for k, v in per_example.items()}
+
+
+def evaluate(prediction: Dict, gold: List[Dict]) -> Dict[str, float]:
+    """Drop-in replacement for the official `eval(prediction, gold)`."""
+    return aggregate(score_examples(prediction, gold))
+
+
+def bootstrap_ci(
+    values: np.ndarray,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+) -> Tuple[float, float]:
+    """Percentile bootstrap confidence interval for the mean of `values`."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return 0.0, 0.0
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, len(values), size=(n_resamples, len(values)))
+    means = values[samples].mean(axis=1)
+    alpha = (1.0 - confidence) / 2
+    lo, hi = np.quantile(means, [alpha, 1.0 - alpha])
+    return float(lo), float(hi)
+
+
+def confidence_intervals(per_example: Dict[str, np.ndarray], **kwargs) -> Dict[str, Tuple[float, float]]:
+    return {k: bootstrap_ci(v, **kwargs) for k, v in per_example.items()}
@@ -0,0 +1,181 @@
+# parity check of qa_system.data.metrics against the official hotpot_evaluate_v1.py
+# run with: python -m pytest qa_system/data/metrics_test.py
+
+import random
+import re
+import string
+from collections import Counter
+
+from qa_system.data.metrics import evaluate, score_examples, bootstrap_ci
+
+
+# --- official hotpot_evaluate_v1.py (verbatim) ---
+
+def normalize_answer(s):
+
+    def remove_articles(text):
+        return re.sub(r'\b(a|an|the)\b', ' ', text)
+
+    def white_space_fix(text):
+        return ' '.join(text.split())
+
+    def remove_punc(text):
+        exclude = set(string.punctuation)
+        return ''.join(ch for ch in text if ch not in exclude)
+
+    def lower(text):
+        return text.lower()
+
+    return white_space_fix(remove_articles(remove_punc(lower(s))))
+
+
+def f1_score(prediction, ground_truth):
+    normalized_prediction = normalize_answer(prediction)
+    normalized_ground_truth = normalize_answer(ground_truth)
+
+    ZERO_METRIC = (0, 0, 0)
+
+    if normalized_prediction in ['yes', 'no', 'noanswer'] and normalized_prediction != normalized_ground_truth:
+        return ZERO_METRIC
+    if normalized_ground_truth in ['yes', 'no', 'noanswer'] and normalized_prediction != normalized_ground_truth:
+        return ZERO_METRIC
+
+    prediction_tokens = normalized_prediction.split()
+    ground_truth_tokens = normalized_ground_truth.split()
+    common = Counter(prediction_tokens) & Counter(ground_truth_tokens)
+    num_same = sum(common.values())
+    if num_same == 0:
+        return ZERO_METRIC
+    precision = 1.0 * num_same / len(prediction_tokens)
+    recall = 1.0 * num_same / len(ground_truth_tokens)
+    f1 = (2 * precision * recall) / (precision + recall)
+    return f1, precision, recall
+
+
+def exact_match_score(prediction, ground_truth):
+    return (normalize_answer(prediction) == normalize_answer(ground_truth))
+
+def update_answer(metrics, prediction, gold):
+    em = exact_match_score(prediction, gold)
+    f1, prec, recall = f1_score(prediction, gold)
+    metrics['em'] += float(em)
+    metrics['f1'] += f1
+    metrics['prec'] += prec
+    metrics['recall'] += recall
+    return em, prec, recall
+
+def update_sp(metrics, prediction, gold):
+    cur_sp_pred = set(map(tuple, prediction))
+    gold_sp_pred = set(map(tuple, gold))
+    tp, fp, fn = 0, 0, 0
+    for e in cur_sp_pred:
+        if e in gold_sp_pred:
+            tp += 1
+        else:
+            fp += 1
+    for e in gold_sp_pred:
+        if e not in cur_sp_pred:
+            fn += 1
+    prec = 1.0 * tp / (tp + fp) if tp + fp > 0 else 0.0
+    recall = 1.0 * tp / (tp + fn) if tp + fn > 0 else 0.0
+    f1 = 2 * prec * recall / (prec + recall) if prec + recall > 0 else 0.0
+    em = 1.0 if fp + fn == 0 else 0.0
+    metrics['sp_em'] += em
+    metrics['sp_f1'] += f1
+    metrics['sp_prec'] += prec
+    metrics['sp_recall'] += recall
+    return em, prec, recall
+
+def official_eval(prediction, gold):
+    metrics = {'em': 0, 'f1': 0, 'prec': 0, 'recall': 0,
+        'sp_em': 0, 'sp_f1': 0, 'sp_prec': 0, 'sp_recall': 0,
+        'joint_em': 0, 'joint_f1': 0, 'joint_prec': 0, 'joint_recall': 0}
+    for dp in gold:
+        cur_id = dp['_id']
+        can_eval_joint = True
+        if cur_id not in prediction['answer']:
+            can_eval_joint = False
+        else:
+            em, prec, recall = update_answer(
+                metrics, prediction['answer'][cur_id], dp['answer'])
+        if cur_id not in prediction['sp']:
+            can_eval_joint = False
+        else:
+            sp_em, sp_prec, sp_recall = update_sp(
+                metrics, prediction['sp'][cur_id], dp['supporting_facts'])
+
+        if can_eval_joint:
+            joint_prec = prec * sp_prec
+            joint_recall = recall * sp_recall
+            if joint_prec + joint_recall > 0:
+                joint_f1 = 2 * joint_prec * joint_recall / (joint_prec + joint_recall)
+            else:
+                joint_f1 = 0.
+            joint_em = em * sp_em
+
+            metrics['joint_em'] += joint_em
+            metrics['joint_f1'] += joint_f1
+            metrics['joint_prec'] += joint_prec
+            metrics['joint_recall'] += joint_recall
+
+    N = len(gold)
+    for k in metrics.keys():
+        metrics[k] /= N
+
+    return metrics
+
+
+# --- synthetic predictions covering the edge cases ---
+
+WORDS = ["the", "a", "an", "Paris", "France", "yes", "no", "noanswer", "Ed", "Wood",
+         "American", "1932", "U.S.", "Scott's", "film-maker", "  ", "Laleli", "Mosque"]
+TITLES = ["Ed Wood", "Scott Derrickson", "Laleli Mosque", "Esma Sultan Mansion"]
+
+
+def _answer(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 4)))
+
+
+def _facts(rng):
+    return [[rng.choice(TITLES), rng.randint(0, 3)] for _ in range(rng.randint(0, 4))]
+
+
+def _synthetic(n=2000, seed=13):
+    rng = random.Random(seed)
+    gold, answers, sps = [], {}, {}
+    for i in range(n):
+        qid = f"q{i}"
+        gold.append({"_id": qid, "answer": _answer(rng), "supporting_facts": _facts(rng)})
+        r = rng.random()
+        if r < 0.05:
+            pass  # missing answer: no answer or joint metrics for this example
+        elif r < 0.15:
+            answers[qid] = gold[-1]["answer"]
+        else:
+            answers[qid] = _answer(rng)
+        if rng.random() > 0.05:
+            sps[qid] = gold[-1]["supporting_facts"] if rng.random() < 0.2 else _facts(rng)
+    return {"answer": answers, "sp": sps}, gold
+
+
+def test_evaluate_matches_official():
+    prediction, gold = _synthetic()
+    expected = official_eval(prediction, gold)
+    got = evaluate(prediction, gold)
+    assert set(got) == set(expected)
+    for k in expected:
+        assert abs(got[k] - expected[k]) < 1e-12, (k, got[k], expected[k])
+
+
+def test_per_example_arrays_align_with_gold():
+    prediction, gold = _synthetic(n=50)
+    per_example = score_examples(prediction, gold)
+    for values in per_example.values():
+        assert values.shape == (50,)
+
+
+def test_bootstrap_ci_brackets_mean():
+    prediction, gold = _synthetic(n=500)
+    f1 = score_examples(prediction, gold)["f1"]
+    lo, hi = bootstrap_ci(f1, n_resamples=200)
+    assert lo <= f1.mean() <= hi
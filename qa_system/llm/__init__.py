@@ -1,4 +1,3 @@
 from .llm import LLM
 
 __all__ = ["LLM"]
-
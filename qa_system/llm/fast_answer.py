@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional, Tuple
+import re
+import torch
+from sentence_transformers import CrossEncoder
+from transformers import pipeline
+from qa_system.utils import Settings
+
+
+# Questions opening with an auxiliary verb ("Are both ...", "Was X ...") expect yes/no
+_YES_NO = re.compile(r"^\s*(is|are|was|were|do|does|did|can|could|has|have|had|will|would|should)\b\s*(.*?)\??\s*$", re.IGNORECASE)
+# ... unless they offer options ("Was X or Y born first?"), which have span answers
+_CHOICE = re.compile(r"\bor\b", re.IGNORECASE)
+
+
+def is_choice_question(question: str) -> bool:
+    return bool(_YES_NO.match(question) and _CHOICE.search(question))
+
+
+# lowercase words that can sit inside a name ("Lord of the Rings", "Ludwig van Beethoven")
+_NAME_WORDS = {"of", "the", "de", "la", "le", "du", "da", "van", "von", "der", "del", "&"}
+
+
+def _split_subject(head: str) -> Optional[Tuple[str, str]]:
+    """
+    Split the text before a marker into (subject, rest): "A and B located in"
+    -> ("A and B", "located in"). None when the subject's end can't be found.
+    """
+    words = head.split()
+    if "and" not in words:
+        # a single subject: only trust it when nothing follows the name
+        return (head, "") if words and not words[-1][:1].islower() else None
+    end = words.index("and") + 2  # the first word after "and" always belongs to B
+    if end > len(words):
+        return None
+    while end < len(words) and (not words[end][:1].islower() or words[end] in _NAME_WORDS):
+        end += 1
+    return " ".join(words[:end]), " ".join(words[end:])
+
+
+def yes_no_statement(question: str) -> Optional[str]:
+    """
+    Declarative hypothesis for a yes/no question, or None when the question is
+    not yes/no or can't be turned into a statement (it then goes to the LLM).
+
+    "Are X and Y both Z?" -> "X and Y are both Z"; "Are X and Y located in the
+    same Z?" -> "X and Y are located in the same Z"; "Did X and Y share Z?" ->
+    "X and Y share Z". Choice questions ("Was X or Y born first?") are not yes/no.
+    """
+    m = _YES_NO.match(question)
+    if not m or is_choice_question(question):
+        return None
+    aux, rest = m.group(1).lower(), m.group(2)
+    if aux in ("do", "does", "did"):  # "Do X and Y share Z?" -> "X and Y share Z"
+        return rest
+    for marker in (" both ", " of the same ", " the same ", " also "):
+        if marker in rest:
+            head, tail = rest.split(marker, 1)
+            split = _split_subject(head)
+            if split is None:
+                return None
+            subject, verb = split
+            return " ".join(p for p in (subject, aux, verb) if p) + marker + tail
+    return None
+
+
+class FastAnswerer:
+    """
+    Cheap answers for questions that don't need the generator.
+
+    Yes/no questions are scored with an NLI cross-encoder (premise = the top
+    contexts, hypothesis = the question as a statement); everything else with
+    an extractive QA model over each top context. An answer is returned only
+    when its confidence reaches `threshold`, otherwise None and the pipeline
+    falls through to the LLM.
+    """
+
+    def __init__(
+        self,
+        model_name: str = None,
+        yes_no_model_name: str = None,
+        threshold: float = None,
+        top_k: int = None,
+        device: Optional[str] = None,
+    ) -> None:
+        cfg = Settings()
+        self.threshold = threshold if threshold is not None else cfg.fast_answer_threshold
+        self.top_k = top_k or cfg.fast_answer_top_k
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        self.extractor = pipeline("question-answering", model=model_name or cfg.fast_answer_model, device=device)
+        self.nli = CrossEncoder(yes_no_model_name or cfg.fast_answer_yes_no_model, device=device)
+        labels = {v.lower(): int(k) for k, v in self.nli.model.config.id2label.items()}
+        self.entail_idx, self.contra_idx = labels["entailment"], labels["contradiction"]
+        self.stats: Dict[str, int] = {"calls": 0, "answered": 0, "span": 0, "yes_no": 0}
+
+    def _yes_no(self, statement: str, contexts: List[str]) -> Dict:
+        probs = self.nli.predict([(" ".join(contexts), statement)], apply_softmax=True, show_progress_bar=False)[0]
+        entail, contra = float(probs[self.entail_idx]), float(probs[self.contra_idx])
+        return {"answer": "yes" if entail >= contra else "no", "score": max(entail, contra), "kind": "yes_no"}
+
+    def _span(self, question: str, contexts: List[str]) -> Dict:
+        outputs = self.extractor(question=[question] * len(contexts), context=contexts, handle_impossible_answer=True)
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        best = max(outputs, key=lambda o: o["score"])
+        return {"answer": best["answer"].strip(), "score": float(best["score"]), "kind": "span"}
+
+    def answer(self, question: str, contexts: List[str]) -> Optional[Dict]:
+        """{'answer', 'score', 'kind'} when confident enough, else None."""
+        contexts = [c for c in contexts[:self.top_k] if c and c.strip()]
+        if not contexts:
+            return None
+        self.stats["calls"] += 1
+
+        statement = yes_no_statement(question)
+        if statement:
+            out = self._yes_no(statement, contexts)
+        elif _YES_NO.match(question) and not is_choice_question(question):
+            return None  # yes/no question with no statement form: leave it to the LLM
+        else:
+            out = self._span(question, contexts)
+        if not out["answer"] or out["score"] < self.threshold:
+            return None
+        self.stats["answered"] += 1
+        self.stats[out["kind"]] += 1
+        return out
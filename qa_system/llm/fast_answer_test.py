@@ -0,0 +1,41 @@
+# yes/no question -> NLI hypothesis on HotpotQA comparison questions
+# run with: python -m pytest qa_system/llm/fast_answer_test.py
+
+from qa_system.llm.fast_answer import is_choice_question, yes_no_statement
+
+
+def test_comparison_statements():
+    cases = {
+        "Are the Laleli Mosque and Esma Sultan Mansion located in the same neighborhood?":
+            "the Laleli Mosque and Esma Sultan Mansion are located in the same neighborhood",
+        "Are Jonny Craig and Pete Doherty from the same country?":
+            "Jonny Craig and Pete Doherty are from the same country",
+        "Were Scott Derrickson and Ed Wood of the same nationality?":
+            "Scott Derrickson and Ed Wood were of the same nationality",
+        "Are Random House Tower and 888 7th Avenue both used for real estate?":
+            "Random House Tower and 888 7th Avenue are both used for real estate",
+        "Are The Lord of the Rings and The Hobbit both novels?":
+            "The Lord of the Rings and The Hobbit are both novels",
+        "Are cats and dogs both mammals?":
+            "cats and dogs are both mammals",
+        "Was Ed Wood also a director?":
+            "Ed Wood was also a director",
+        "Did Scott Derrickson and Ed Wood share a nationality?":
+            "Scott Derrickson and Ed Wood share a nationality",
+    }
+    for question, statement in cases.items():
+        assert yes_no_statement(question) == statement, question
+
+
+def test_no_statement_when_subject_is_unclear():
+    # a verb follows a single subject: no safe place for the auxiliary
+    assert yes_no_statement("Was Ed Wood born in the same year as Scott Derrickson?") is None
+    assert yes_no_statement("Are Scott Derrickson and Ed Wood directors?") is None
+
+
+def test_choice_questions_are_not_yes_no():
+    question = "Was Scott Derrickson or Ed Wood born first?"
+    assert is_choice_question(question)
+    assert yes_no_statement(question) is None
+    assert not is_choice_question("Which was born first, Scott Derrickson or Ed Wood?")
+    assert yes_no_statement("Which was born first, Scott Derrickson or Ed Wood?") is None
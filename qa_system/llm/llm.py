@@ -2,36 +2,33 @@
 from typing import Dict, List
 import ollama
 import re
+from qa_system.utils import Settings
 
 class LLM:
-    def __init__(self) -> None:
-        pass
-
-
-    def answer(self, question: str, contexts: List[str]) -> Dict:
+    def __init__(self, model_name: str = None) -> None:
+        cfg = Settings()
+        self.model_name = model_name or cfg.llm_model_name
+        self.system_prompt = cfg.llm_system_prompt
+        self.user_template = cfg.llm_user_template
+
+    def config(self) -> Dict:
+        """Settings that change the answer (used to key cached LLM outputs)."""
+        return {"model_name": self.model_name, "system_prompt": self.system_prompt, "user_template": self.user_template}
+
+    def build_messages(self, question: str, contexts: List[str]) -> List[Dict]:
+        """Fixed system prompt first, then the per-request context and question."""
         # combine retrieved docs into a single context string
         context = "\n\n".join(f"Document {i+1}: {doc}" for i, doc in enumerate(contexts))
+        return [
+            {'role': 'system', 'content': self.system_prompt},
+            {'role': 'user', 'content': self.user_template.format(context=context, question=question)},
+        ]
 
-        prompt= f"""
-        You are an advanced RAG-based question-answering agent.
-        Directly answer the question using the retrieved context.
-
-        Question:
-        {question}
-
-        Retrieved Context:
-        {context}
-
-        Instructions:
-            - Directly state the answer ONLY and nothing more
-            - If the context is insufficient, just say “INSUFFICIENT EVIDENCE” and nothing more
-            
-        """
-
+    def answer(self, question: str, contexts: List[str]) -> Dict:
         # Query the model
         response = ollama.chat(
-            model='qwen3:0.6b',
-            messages=[{'role': 'user', 'content': prompt}]
+            model=self.model_name,
+            messages=self.build_messages(question, contexts),
         )
 
         
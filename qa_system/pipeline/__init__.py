@@ -1,4 +1,4 @@
 from .qa_pipeline import QAPipeline
+from .artifacts import ArtifactStore
 
-__all__ = ["QAPipeline"]
-
+__all__ = ["QAPipeline", "ArtifactStore"]
@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import os
+import threading
+
+
+def stable_hash(obj: Any) -> str:
+    """sha256 of the canonical JSON form of obj."""
+    data = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed cache of pipeline stage outputs (rewrites, candidate
+    lists, reranked lists, LLM answers).
+
+    A record is keyed by hash(stage name, stage config hash, input hash), so
+    pipelines that share a stage with the same settings and inputs reuse one
+    result. Each stage is one append-only `<root>/<stage>.jsonl` file of
+    `key<TAB>json` lines; the key -> offset index is built by scanning the file
+    the first time a stage is used.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._offsets: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(stage: str, config: Dict, inputs: Dict) -> str:
+        return stable_hash([stage, stable_hash(config), stable_hash(inputs)])
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.root, f"{stage}.jsonl")
+
+    def _index(self, stage: str) -> Dict[str, int]:
+        """key -> byte offset of its record, loaded on first use of the stage."""
+        if stage not in self._offsets:
+            offsets: Dict[str, int] = {}
+            path = self._path(stage)
+            if os.path.exists(path):
+                with open(path, "rb+") as f:
+                    offset = 0
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # torn write from an interrupted run: drop it so appends stay line-aligned
+                            f.truncate(offset)
+                            break
+                        key, sep, _ = line.partition(b"\t")
+                        if sep:
+                            offsets[key.decode()] = offset
+                        offset += len(line)
+            self._offsets[stage] = offsets
+            self.stats[stage] = {"hits": 0, "misses": 0}
+        return self._offsets[stage]
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        with self._lock:
+            offset = self._index(stage).get(key)
+        if offset is None:
+            return None
+        with open(self._path(stage), "rb") as f:
+            f.seek(offset)
+            _, _, payload = f.readline().partition(b"\t")
+        return json.loads(payload)
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        line = f"{key}\t{json.dumps(value, separators=(',', ':'), ensure_ascii=False)}\n".encode("utf-8")
+        with self._lock:
+            offsets = self._index(stage)
+            if key in offsets:
+                return
+            with open(self._path(stage), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offsets[key] = f.tell()
+                f.write(line)
+
+    def get_or_compute(self, stage: str, config: Dict, inputs: Dict, compute: Callable[[], Any]) -> Any:
+        """
+        Stored value for (stage, config, inputs), or compute(), store and return
+        it. If compute() raises, nothing is stored and the error propagates, so
+        stages must raise on failure rather than return a fallback value.
+        """
+        key = self.key(stage, config, inputs)
+        value = self.get(stage, key)
+        with self._lock:
+            self.stats[stage]["hits" if value is not None else "misses"] += 1
+        if value is None:
+            value = compute()
+            self.put(stage, key, value)
+        return value
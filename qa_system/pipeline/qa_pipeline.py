@@ -1,30 +1,143 @@
 # The orchestrator of the pipeline is done here
-from typing import Dict, List
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
-from qa_system.retrieval import Retriever
-from qa_system.reranker import Reranker
+import numpy as np
+
+from qa_system.retrieval import Retriever, CandidateSet
+from qa_system.reranker import Reranker, CascadeReranker
 from qa_system.llm import LLM
-from qa_system.query_rewriter.rewriter import QueryRewriter
+from qa_system.query_rewriter.rewriter import QueryRewriter, RewriteError
+from qa_system.pipeline.artifacts import ArtifactStore
 from qa_system.utils import Settings
 
+if TYPE_CHECKING:  # imports transformers; only loaded when the fast path is enabled
+    from qa_system.llm.fast_answer import FastAnswerer
+
 
 class QAPipeline:
-    def __init__(self, retriever: Retriever = None, reranker: Reranker = None, llm: LLM = None, query_rewriter: QueryRewriter = None) -> None:
+    def __init__(self, retriever: Retriever = None, reranker: Reranker = None, llm: LLM = None, query_rewriter: QueryRewriter = None, speculative: Optional[bool] = None, fast_answerer: "FastAnswerer" = None, artifact_store: ArtifactStore = None) -> None:
         self.retriever = retriever
         self.reranker = reranker
         self.llm = llm
         self.query_rewriter = query_rewriter
+        self.fast_answerer = fast_answerer
+        self.artifact_store = artifact_store
         self.cfg = Settings()
+        self.speculative = self.cfg.speculative_rewrite if speculative is None else speculative
+
+    # ---- stages, read from / written to the artifact store when one is set ----
+
+    def _cached(self, stage: str, config: Dict, inputs: Dict, compute: Callable):
+        if self.artifact_store is None:
+            return compute()
+        return self.artifact_store.get_or_compute(stage, config, inputs, compute)
+
+    def _cached_candidates(self, stage: str, config: Dict, inputs: Dict, compute: Callable[[], CandidateSet]) -> CandidateSet:
+        if self.artifact_store is None:
+            return compute()
+        record = self.artifact_store.get_or_compute(stage, config, inputs, lambda: compute().to_record())
+        return CandidateSet.from_record(record, store=self.retriever.document_ids_to_sentence)
+
+    def _rewrite(self, question: str, reasoning_steps: List[str]) -> List[str]:
+        # a failed rewrite raises, so it is reported here and never stored
+        try:
+            return self._cached(
+                "rewrite", self.query_rewriter.config(), {"question": question},
+                lambda: self.query_rewriter.rewrite_query(question, raise_on_error=True),
+            )
+        except RewriteError as e:
+            reasoning_steps.append(f"Query rewriting failed ({e}); searching with the original question only")
+            return []
+
+    def _max_candidates(self, num_queries: int) -> int:
+        """
+        Candidates kept after merging the per-query results. A cascade reranker
+        gets the whole union, since its cheap first stage does the pruning;
+        otherwise the merge is capped at retrieval_top_k.
+        """
+        if isinstance(self.reranker, CascadeReranker):
+            return self.cfg.retrieval_top_k * num_queries
+        return self.cfg.retrieval_top_k
+
+    def _retrieve(self, queries: List[str], top_k: int, max_candidates: Optional[int] = None) -> CandidateSet:
+        max_candidates = max_candidates or top_k
+        return self._cached_candidates(
+            "retrieve", self.retriever.config(), {"queries": queries, "top_k": top_k, "max_candidates": max_candidates},
+            lambda: self.retriever.retrieve_multiple(queries, top_k=top_k, max_candidates=max_candidates),
+        )
+
+    def _rerank(self, question: str, candidates: CandidateSet, top_k: int) -> CandidateSet:
+        # candidate texts come from the index, so it is part of the config
+        return self._cached_candidates(
+            "rerank", {"reranker": self.reranker.config(), "index": self.retriever.config()},
+            {"question": question, "candidates": candidates.to_record(), "top_k": top_k},
+            lambda: self.reranker.rerank(question, candidates, top_k=top_k),
+        )
+
+    def _generate(self, question: str, contexts: List[str]) -> Dict:
+        return self._cached(
+            "llm", self.llm.config(), {"question": question, "contexts": contexts},
+            lambda: self.llm.answer(question, contexts),
+        )
+
+    def _retrieve_speculative(self, question: str, reasoning_steps: List[str]) -> Tuple[List[str], CandidateSet, Optional[CandidateSet]]:
+        """
+        Search the original question while the rewriter's LLM call is in flight,
+        then search only the new sub-queries and merge. With speculative_rerank
+        the first-wave candidates are also reranked before the rewrite returns.
+
+        Returns (rewritten_queries, candidates, reranked top docs or None).
+        """
+        top_k = self.cfg.retrieval_top_k
+        reasoning_steps.append("Rewriting query while retrieving with the original question...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            rewrite_future = pool.submit(self._rewrite, question, reasoning_steps)
+            first_wave = self._retrieve([question], top_k)
+            rerank_future = None
+            # a cascade prunes per call, so reranking the first wave on its own
+            # would send its dropped candidates through the cascade a second time
+            if self.reranker and self.cfg.speculative_rerank and not isinstance(self.reranker, CascadeReranker):
+                rerank_future = pool.submit(self._rerank, question, first_wave, len(first_wave))
+
+            sub_queries = []
+            for q in rewrite_future.result():
+                if q != question and q not in sub_queries:
+                    sub_queries.append(q)
+            rewritten_queries = [question] + sub_queries
+            reasoning_steps.append(f"Generated {len(rewritten_queries)} query variations")
+
+            # sub-queries are numbered after the original question, as in the serial path
+            second_wave = None
+            if sub_queries:
+                second_wave = self._retrieve(sub_queries, top_k, self._max_candidates(len(sub_queries))).with_query_offset(1)
+            candidates = self.retriever.merge([first_wave, second_wave], self._max_candidates(len(rewritten_queries)))
+            if rerank_future is None:
+                return rewritten_queries, candidates, None
+            first_scored = rerank_future.result()
+
+        # Only score candidates the first wave did not already cover
+        reasoning_steps.append("Reranking retrieved documents...")
+        covered = first_scored.contains(candidates.doc_ids)
+        # reuse first-wave scores on the merged rows (merged retriever score and query of origin)
+        first_scores = dict(zip(first_scored.doc_ids.tolist(), first_scored.reranker_scores.tolist()))
+        known = candidates.take(np.flatnonzero(covered))
+        known = known.with_reranker_scores([first_scores[d] for d in known.doc_ids.tolist()])
+        remaining = candidates.take(np.flatnonzero(~covered))
+        if len(remaining):
+            remaining = self._rerank(question, remaining, len(remaining))
+        top_docs = CandidateSet.concat([known, remaining]).top_k(self.cfg.rerank_top_k)
+        return rewritten_queries, candidates, top_docs
 
     def answer_question(self, question: str) -> Dict:
         reasoning_steps: List[str] = []
         rewritten_queries = [question]
-        top_docs = []
+        top_docs = None
         
         # No Retriever configuration (Direct LLM only)
         if not self.retriever:
             reasoning_steps.append("Using direct LLM without retrieval...")
-            llm_out = self.llm.answer(question, contexts=[])
+            llm_out = self._generate(question, [])
             llm_reasoning = llm_out.get("reasoning_steps", [])
             reasoning_steps.extend(llm_reasoning)
             
@@ -35,27 +148,46 @@ class QAPipeline:
                 "rewritten_queries": [question],
             }
 
-        # Step 1: Query Rewriting (if available)
-        if self.query_rewriter:
-            reasoning_steps.append("Rewriting query for better retrieval...")
-            rewritten_queries.extend(self.query_rewriter.rewrite_query(question))
-            reasoning_steps.append(f"Generated {len(rewritten_queries)} query variations")     
-        # Step 2: Retrieval with multiple queries
-        reasoning_steps.append("Retrieving relevant documents...")
-        candidates = self.retriever.retrieve_multiple(rewritten_queries, top_k=self.cfg.retrieval_top_k)
-
-        # Step 3: Reranking (if available)
-        if not self.reranker:
-            reasoning_steps.append("Using retrieved documents without reranking...")
-            top_docs = candidates[:self.cfg.rerank_top_k]  # Take top k from retrieval
+        # Steps 1-2 (speculative): retrieval overlapped with query rewriting
+        if self.query_rewriter and self.speculative:
+            rewritten_queries, candidates, top_docs = self._retrieve_speculative(question, reasoning_steps)
         else:
+            # Step 1: Query Rewriting (if available)
+            if self.query_rewriter:
+                reasoning_steps.append("Rewriting query for better retrieval...")
+                rewritten_queries.extend(self._rewrite(question, reasoning_steps))
+                reasoning_steps.append(f"Generated {len(rewritten_queries)} query variations")
+            # Step 2: Retrieval with multiple queries
+            reasoning_steps.append("Retrieving relevant documents...")
+            candidates = self._retrieve(rewritten_queries, self.cfg.retrieval_top_k, self._max_candidates(len(rewritten_queries)))
+
+        # Step 3: Reranking (if available and not already done alongside the rewriter)
+        if top_docs is None and not self.reranker:
+            reasoning_steps.append("Using retrieved documents without reranking...")
+            top_docs = candidates.head(self.cfg.rerank_top_k)  # Take top k from retrieval
+        elif top_docs is None:
             reasoning_steps.append("Reranking retrieved documents...")
-            top_docs = self.reranker.rerank(question, candidates, top_k=self.cfg.rerank_top_k)
+            top_docs = self._rerank(question, candidates, self.cfg.rerank_top_k)
 
-        # Step 4: LLM Answer Generation
+        contexts = top_docs.texts.tolist()
+        rewritten_queries = rewritten_queries if self.query_rewriter else [question]
+
+        # Step 4 (optional): Fast path, answered from the top contexts without the LLM
+        if self.fast_answerer:
+            fast = self.fast_answerer.answer(question, contexts)
+            if fast:
+                reasoning_steps.append(f"Answered on the fast path ({fast['kind']}, confidence {fast['score']:.2f})")
+                return {
+                    "answer": fast["answer"],
+                    "reasoning_steps": reasoning_steps,
+                    "contexts": top_docs.to_dicts(),
+                    "rewritten_queries": rewritten_queries,
+                    "fast_path": True,
+                }
+
+        # Step 5: LLM Answer Generation
         reasoning_steps.append("Generating answer with LLM...")
-        contexts = [d.get("text", "") for d in top_docs]
-        llm_out = self.llm.answer(question, contexts)
+        llm_out = self._generate(question, contexts)
         
         
         llm_reasoning = llm_out.get("reasoning_steps", []) 
@@ -64,32 +196,44 @@ class QAPipeline:
         return {
             "answer": llm_out.get("answer", ""),
             "reasoning_steps": reasoning_steps,
-            "contexts": top_docs,
-            "rewritten_queries": rewritten_queries if self.query_rewriter else [question],
+            "contexts": top_docs.to_dicts(),
+            "rewritten_queries": rewritten_queries,
+            "fast_path": False,
         }
     
-def build_pipeline(use_rewriter: bool = True) -> "QAPipeline":
+def build_reranker():
+    """
+    Reranker (or cascade) from Settings. With reranker_num_workers > 1 the large
+    model's CPU worker pool is forked here, so build it once at startup before
+    anything is scored and share it between pipelines.
+    """
+    reranker = CascadeReranker() if Settings().reranker_cascade else Reranker()
+    large = reranker.reranker if isinstance(reranker, CascadeReranker) else reranker
+    large.start_pool()
+    return reranker
+
+
+def build_pipeline(use_rewriter: bool = True, reranker=None) -> "QAPipeline":
     retriever = Retriever()
-    reranker = Reranker()
+    reranker = reranker or build_reranker()
     llm = LLM()
     qr = QueryRewriter() if use_rewriter else None
-    return QAPipeline(retriever=retriever, reranker=reranker, llm=llm, query_rewriter=qr)
+    fast = None
+    if Settings().fast_answer:
+        from qa_system.llm.fast_answer import FastAnswerer
+        fast = FastAnswerer()
+    return QAPipeline(retriever=retriever, reranker=reranker, llm=llm, query_rewriter=qr, fast_answerer=fast)
 
 
 
 if __name__ == "__main__":
-    import json
-    import random
     import torch
+    from qa_system.data import HotpotQADataset
     if torch.cuda.is_available():
         torch.cuda.empty_cache()
         
-    # Load the dataset and pick a random question
-    with open('qa_system/data/hotpot_dev_distractor_v1.json', 'r') as f:
-        data = json.load(f)
-    
-    # Pick a random question
-    random_sample = random.choice(data)
+    # Pick a random question (streams the split into a small cache on first run)
+    random_sample = HotpotQADataset('qa_system/data/hotpot_dev_distractor_v1.json').sample()
     test_question = random_sample['question']
     ground_truth = random_sample['answer']
     
@@ -99,7 +243,7 @@ if __name__ == "__main__":
     
     
     retriever = Retriever()
-    reranker = Reranker()
+    reranker = build_reranker()
     llm = LLM()
     query_rewriter = QueryRewriter()
     pipeline = QAPipeline(retriever=retriever, reranker=reranker, llm=llm, query_rewriter=query_rewriter)
@@ -0,0 +1,125 @@
+# speculative (rewrite || retrieve, partial rerank) vs. serial pipeline on stub components
+# run with: python -m pytest qa_system/pipeline/qa_pipeline_test.py
+
+import hashlib
+
+import numpy as np
+
+from qa_system.pipeline import QAPipeline
+from qa_system.pipeline.artifacts import ArtifactStore
+from qa_system.query_rewriter.rewriter import RewriteError
+from qa_system.reranker.cascade import CascadeReranker, COLBERT_STAGE
+from qa_system.retrieval import Retriever, CandidateSet
+from qa_system.utils import Settings
+
+
+STORE = {f"d{i}": f"document {i}" for i in range(40)}
+
+
+def _score(query: str, doc_id: str) -> float:
+    return int(hashlib.md5(f"{query}|{doc_id}".encode()).hexdigest()[:8], 16) / 16 ** 8
+
+
+class StubRetriever:
+    document_ids_to_sentence = STORE
+    merge = staticmethod(Retriever.merge)
+
+    def config(self):
+        return {}
+
+    def retrieve_multiple(self, queries, top_k, max_candidates=None):
+        all_results = [
+            sorted(({"id": d, "score": _score(q, d)} for d in STORE), key=lambda r: -r["score"])[:top_k]
+            for q in queries
+        ]
+        return self.merge([CandidateSet.from_results(all_results, store=STORE)], max_candidates or top_k)
+
+
+class StubReranker:
+    def config(self):
+        return {}
+
+    def rerank(self, query, candidates, top_k):
+        scores = [_score("rerank", d) for d in candidates.doc_ids.tolist()]
+        return candidates.with_reranker_scores(scores).top_k(top_k)
+
+
+class StubRewriter:
+    def config(self):
+        return {}
+
+    def rewrite_query(self, query, raise_on_error=False):
+        return [f"{query} sub 1", f"{query} sub 2"]
+
+
+class FlakyRewriter(StubRewriter):
+    """Fails the first call (e.g. Ollama down), then rewrites normally."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def rewrite_query(self, query, raise_on_error=False):
+        self.calls += 1
+        if self.calls == 1:
+            raise RewriteError("rewriter model call failed: connection refused")
+        return super().rewrite_query(query, raise_on_error)
+
+
+class StubLLM:
+    def config(self):
+        return {}
+
+    def answer(self, question, contexts):
+        return {"answer": "stub", "reasoning_steps": ""}
+
+
+def _pipeline(speculative: bool) -> QAPipeline:
+    pipeline = QAPipeline(
+        retriever=StubRetriever(), reranker=StubReranker(), llm=StubLLM(),
+        query_rewriter=StubRewriter(), speculative=speculative,
+    )
+    pipeline.cfg = Settings(speculative_rerank=True, retrieval_top_k=8, rerank_top_k=5)
+    return pipeline
+
+
+def test_speculative_matches_serial():
+    for question in ("q1", "who was first?", "another question"):
+        serial = _pipeline(False).answer_question(question)
+        speculative = _pipeline(True).answer_question(question)
+        assert speculative["rewritten_queries"] == serial["rewritten_queries"]
+        assert speculative["contexts"] == serial["contexts"]
+
+
+def test_speculative_keeps_query_of_origin():
+    pipeline = _pipeline(True)
+    _, candidates, _ = pipeline._retrieve_speculative("q1", [])
+    expected = StubRetriever().retrieve_multiple(["q1", "q1 sub 1", "q1 sub 2"], 8)
+    assert np.array_equal(candidates.doc_ids, expected.doc_ids)
+    assert np.array_equal(candidates.query_idx, expected.query_idx)
+
+
+def test_cascade_sees_union_and_skips_speculative_rerank():
+    for speculative in (False, True):
+        pipeline = _pipeline(speculative)
+        pipeline.reranker = CascadeReranker(reranker=StubReranker(), first_stage=COLBERT_STAGE, shortlist=6)
+        result = pipeline.answer_question("q1")
+        stats = pipeline.reranker.stats
+        assert stats["queries"] == 1
+        assert stats["candidates"] > pipeline.cfg.retrieval_top_k
+        assert stats["large_pairs"] == 6
+        assert len(result["contexts"]) == pipeline.cfg.rerank_top_k
+
+
+def test_failed_rewrite_is_reported_and_not_cached(tmp_path):
+    for speculative in (False, True):
+        pipeline = _pipeline(speculative)
+        pipeline.query_rewriter = FlakyRewriter()
+        pipeline.artifact_store = ArtifactStore(str(tmp_path / str(speculative)))
+
+        failed = pipeline.answer_question("q1")
+        assert failed["rewritten_queries"] == ["q1"]
+        assert any("rewriting failed" in step for step in failed["reasoning_steps"])
+
+        retried = pipeline.answer_question("q1")
+        assert pipeline.query_rewriter.calls == 2
+        assert retried["rewritten_queries"] == ["q1", "q1 sub 1", "q1 sub 2"]
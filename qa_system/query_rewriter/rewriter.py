@@ -1,6 +1,33 @@
-from typing import List, Dict
+from typing import List, Dict, Set
+from pydantic import BaseModel, ValidationError
 import ollama
-from starlette.applications import P
+import re
+from qa_system.utils import Settings
+
+
+_BULLET = re.compile(r'^\s*(?:[-*•]+|\d+[.)])\s*')
+_WORD = re.compile(r'\w+')
+
+
+class RewriteError(RuntimeError):
+    """The rewriter model could not be reached or returned unparseable output."""
+
+
+class RewriteOutput(BaseModel):
+    """JSON schema the rewriter model is constrained to."""
+    sub_queries: List[str]
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the word sets of two queries."""
+    wa, wb = _words(a), _words(b)
+    if not wa or not wb:
+        return 0.0
+    return len(wa & wb) / len(wa | wb)
 
 
 class QueryRewriter:
@@ -8,64 +35,129 @@ class QueryRewriter:
     Query rewriter that expands and reformulates queries to improve retrieval.
     Uses LLM to generate multiple query variations and synonyms.
     """
-    
-    def __init__(self, model_name: str = "qwen3:0.6b") -> None:
-        self.model_name = model_name
-    
-    
-    def rewrite_query(self, query: str) -> List[str]:
+
+    def __init__(
+        self,
+        model_name: str = None,
+        max_queries: int = None,
+        num_predict: int = None,
+        similarity_threshold: float = None,
+    ) -> None:
+        cfg = Settings()
+        self.model_name = model_name or cfg.rewriter_model_name
+        self.max_queries = max_queries or cfg.rewriter_max_queries
+        self.num_predict = num_predict or cfg.rewriter_num_predict
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None else cfg.rewriter_similarity_threshold
+        self.system_prompt = cfg.rewriter_system_prompt
+        self.user_template = cfg.rewriter_user_template
+        # running totals, e.g. to compare generated tokens across configs
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "generated_tokens": 0,
+            "errors": 0,
+            "parse_failures": 0,
+            "kept_queries": 0,
+            "dropped_queries": 0,
+        }
+
+
+    def config(self) -> Dict:
+        """Settings that change the rewrites (used to key cached rewrites)."""
+        return {
+            "model_name": self.model_name,
+            "max_queries": self.max_queries,
+            "num_predict": self.num_predict,
+            "similarity_threshold": self.similarity_threshold,
+            "system_prompt": self.system_prompt,
+            "user_template": self.user_template,
+        }
+
+    def build_messages(self, query: str) -> List[Dict]:
+        """Fixed system prompt (instructions + few-shot example) first, then the query."""
+        return [
+            {'role': 'system', 'content': self.system_prompt},
+            {'role': 'user', 'content': self.user_template.format(query=query)},
+        ]
+
+    def rewrite_query(self, query: str, raise_on_error: bool = False) -> List[str]:
         """
         Generate entity-focused query variations.
-        
+
         Args:
             query: Original query
-            
+            raise_on_error: raise RewriteError instead of returning [] when the
+                model fails or its output can't be parsed
+
         Returns:
-            List of entity-focused query variations
+            Up to `max_queries` distinct sub-queries, excluding the original
+            query and near-duplicates of it (the pipeline always searches the
+            original itself). Empty if the model fails or returns junk.
         """
-        prompt = f"""You are a query decomposition agent that decompose queries to multiple sub-queries.
-
-        Example:
-        Question: "Are the Laleli Mosque and Esma Sultan Mansion located in the same neighborhood?"
-        Sub-queries:
-        - What is the neighborhood of the Laleli Mosque?
-        - What is the neighborhood of the Esma Sultan Mansion?
-
-Question: {query}
-
-Create 2-3 focused queries that target specific entities or concepts mentioned. 
-
-IMPORTANT: Return ONLY the focused question queries, one per line"""
-
         try:
             response = ollama.chat(
                 model=self.model_name,
-                messages=[{'role': 'user', 'content': prompt}],
+                messages=self.build_messages(query),
+                format=RewriteOutput.model_json_schema(),
+                think=False,
+                options={'num_predict': self.num_predict, 'temperature': 0},
             )
-            
-            raw_queries = response['message']['content'].strip()
-            
-            queries = []
-            for line in raw_queries.split('\n'):
-                line = line.strip()
-                queries.append(line)
-            
-            return queries[:3]  # Limit to 3 entity queries
-            
         except Exception as e:
+            self.stats["errors"] += 1
             print(f"[QueryRewriter] Entity expansion error: {e}")
-            return [query]
+            if raise_on_error:
+                raise RewriteError(f"rewriter model call failed: {e}") from e
+            return []
+
+        self.stats["calls"] += 1
+        self.stats["prompt_tokens"] += response.get('prompt_eval_count') or 0
+        self.stats["generated_tokens"] += response.get('eval_count') or 0
+
+        try:
+            raw_queries = RewriteOutput.model_validate_json(response['message']['content']).sub_queries
+        except ValidationError as e:
+            # usually output cut off by num_predict
+            self.stats["parse_failures"] += 1
+            print(f"[QueryRewriter] Could not parse sub-queries: {e.errors()[0]['msg']}")
+            if raise_on_error:
+                raise RewriteError(f"could not parse sub-queries: {e.errors()[0]['msg']}") from e
+            return []
+
+        queries = self.clean_queries(query, raw_queries)
+        self.stats["kept_queries"] += len(queries)
+        self.stats["dropped_queries"] += len(raw_queries) - len(queries)
+        return queries
+
+    def clean_queries(self, query: str, raw_queries: List[str]) -> List[str]:
+        """Strip list markers, drop empty/duplicate sub-queries and ones too close to the original."""
+        queries: List[str] = []
+        seen = {query.strip().lower()}
+        for q in raw_queries:
+            q = _BULLET.sub('', q).strip().strip('"\'').strip()
+            key = q.lower()
+            if not _WORD.search(q) or key in seen:
+                continue
+            if _similarity(q, query) >= self.similarity_threshold:
+                continue
+            if any(_similarity(q, kept) >= self.similarity_threshold for kept in queries):
+                continue
+            seen.add(key)
+            queries.append(q)
+            if len(queries) == self.max_queries:
+                break
+        return queries
 
 
 if __name__ == "__main__":
     rewriter = QueryRewriter()
-    
+
     test_query = "Were Scott Derrickson and Ed Wood of the same nationality?"
-    
+
     print(f"Original query: {test_query}")
-    
-    
+
+
     print("\nEntity-focused queries:")
     entity_queries = rewriter.rewrite_query(test_query)
     for i, q in enumerate(entity_queries, 1):
         print(f"{i}. {q}")
+    print(f"\nStats: {rewriter.stats}")
@@ -1,4 +1,4 @@
 from .reranker import Reranker
+from .cascade import CascadeReranker
 
-__all__ = ["Reranker"]
-
+__all__ = ["Reranker", "CascadeReranker"]
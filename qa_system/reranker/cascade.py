@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional, Union
+import numpy as np
+from qa_system.reranker.reranker import Reranker, rerank_dicts, valid_text_mask
+from qa_system.retrieval.candidates import CandidateSet, top_indices
+from qa_system.utils import Settings
+
+
+COLBERT_STAGE = "colbert"
+
+
+class CascadeReranker:
+    """
+    Two-stage reranker with the same `rerank` interface as Reranker.
+
+    The first stage scores every candidate cheaply, either with the ColBERT
+    MaxSim score the retriever already attached ("colbert") or with a small
+    cross-encoder, and keeps the best `shortlist`. Only that shortlist is
+    scored by the large reranker, so its forward passes drop from
+    len(candidates) to `shortlist` per question.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker = None,
+        first_stage: str = None,
+        shortlist: int = None,
+        device: Optional[str] = None,
+    ) -> None:
+        cfg = Settings()
+        self.reranker = reranker or Reranker(device=device)
+        self.first_stage = first_stage or cfg.reranker_cascade_first_stage
+        self.shortlist = shortlist or cfg.reranker_cascade_shortlist
+        self.small = None
+        if self.first_stage != COLBERT_STAGE:
+            self.small = Reranker(model_name=self.first_stage, device=device or self.reranker.device)
+        self.stats: Dict[str, int] = {"queries": 0, "candidates": 0, "large_pairs": 0}
+
+    def config(self) -> Dict:
+        return {"first_stage": self.first_stage, "shortlist": self.shortlist, "reranker": self.reranker.config()}
+
+    def _first_stage(self, query: str, candidates: CandidateSet) -> CandidateSet:
+        """Return the `shortlist` best candidates by the cheap score."""
+        if self.small is None:
+            return candidates.top_k(self.shortlist, by="retriever")
+        texts = candidates.texts
+        valid = valid_text_mask(texts)
+        scores = np.full(len(candidates), -np.inf, dtype=np.float32)
+        if valid.any():
+            scores[valid] = self.small._score_pairs([(query, t) for t in texts[valid]])
+        return candidates.take(top_indices(scores, self.shortlist))
+
+    def rerank_stages(self, query: str, candidates: CandidateSet, top_k: int = None) -> Dict[str, CandidateSet]:
+        """Output of every stage: all candidates, the first-stage shortlist and the final top_k."""
+        if top_k is None:
+            top_k = Settings().rerank_top_k
+        shortlist = self._first_stage(query, candidates) if len(candidates) > self.shortlist else candidates
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(candidates)
+        self.stats["large_pairs"] += len(shortlist)
+        return {
+            "candidates": candidates,
+            "shortlist": shortlist,
+            "final": self.reranker.rerank(query, shortlist, top_k=top_k),
+        }
+
+    def rerank(self, query: str, docs: Union[CandidateSet, List[Dict]], top_k: int = None) -> Union[CandidateSet, List[Dict]]:
+        """Cascade-rerank docs and return the top_k by the large reranker's score."""
+        if isinstance(docs, CandidateSet):
+            return self.rerank_stages(query, docs, top_k)["final"]
+        return rerank_dicts(lambda c: self.rerank_stages(query, c, top_k)["final"], docs)
@@ -0,0 +1,147 @@
+from typing import List, Optional, Tuple
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import numpy as np
+import torch
+
+
+# The model is handed to workers through fork: it is set here in the parent
+# right before the workers start, so every worker reads the parent's weights
+# through copy-on-write pages (inference never writes them) without loading,
+# pickling or copying its own.
+_MODEL = None
+
+# Forking after torch has run inference in this process can hang the workers,
+# so Reranker reports its first in-process scoring call here.
+_INFERENCE_STARTED = False
+
+_POOLS: List["RerankerPool"] = []
+
+
+def note_inference() -> None:
+    global _INFERENCE_STARTED
+    _INFERENCE_STARTED = True
+
+
+@atexit.register
+def close_all() -> None:
+    """Stop the workers of every pool still running (also run at interpreter exit)."""
+    for pool in list(_POOLS):
+        pool.close()
+
+
+def _worker(cores: List[int], threads: int, tasks, results) -> None:
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        job, chunk, pairs, batch_size = item
+        try:
+            with torch.inference_mode():
+                scores = _MODEL.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+            results.put((job, chunk, [float(s) for s in scores], None))
+        except Exception as e:
+            results.put((job, chunk, None, repr(e)))
+
+
+def _available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class RerankerPool:
+    """
+    Data-parallel CPU scoring for a CrossEncoder.
+
+    Forks `num_workers` processes, each pinned to its own group of cores with
+    torch.set_num_threads sized to that group. A batch of pairs is split into
+    contiguous chunks, one per worker, and the scores are reassembled in
+    input order.
+
+    Create the pool once at startup, before the process runs any inference:
+    forking after torch has started its intra-op thread pool can hang the
+    workers, so construction fails once a Reranker has scored in-process.
+    """
+
+    def __init__(self, model, num_workers: int, threads_per_worker: Optional[int] = None, timeout: float = 120.0) -> None:
+        global _MODEL
+        if _INFERENCE_STARTED:
+            raise RuntimeError("[RerankerPool] Create the pool before any reranker inference runs in this process.")
+        model.model.eval()
+        _MODEL = model
+
+        ctx = mp.get_context("fork")
+        cores = _available_cores()
+        if num_workers <= len(cores):
+            groups = [g.tolist() for g in np.array_split(cores, num_workers)]
+        else:  # more workers than cores: share them round-robin
+            groups = [[cores[i % len(cores)]] for i in range(num_workers)]
+        self.timeout = timeout
+        self.results = ctx.Queue()
+        self.tasks = [ctx.Queue() for _ in range(num_workers)]
+        self.workers = [
+            ctx.Process(
+                target=_worker,
+                args=(group, threads_per_worker or max(1, len(group)), tasks, self.results),
+                daemon=True,
+            )
+            for group, tasks in zip(groups, self.tasks)
+        ]
+        for w in self.workers:
+            w.start()
+        self._job = 0
+        self._lock = threading.Lock()
+        _POOLS.append(self)
+        print(f"[RerankerPool] Started {num_workers} workers on core groups {groups}")
+
+    def _check_alive(self) -> None:
+        dead = [w.pid for w in self.workers if not w.is_alive()]
+        if dead:
+            raise RuntimeError(f"[RerankerPool] Worker process(es) {dead} died.")
+
+    def score(self, pairs: List[Tuple[str, str]], batch_size: int = 16) -> List[float]:
+        """Score pairs across the workers; returns scores in input order."""
+        chunks = [c for c in np.array_split(np.arange(len(pairs)), len(self.workers)) if len(c)]
+        with self._lock:  # one batch in flight at a time; results share a queue
+            self._check_alive()
+            self._job += 1
+            job = self._job
+            for i, idx in enumerate(chunks):
+                self.tasks[i].put((job, i, [pairs[j] for j in idx], batch_size))
+            scores: List[Optional[List[float]]] = [None] * len(chunks)
+            error, pending = None, len(chunks)
+            deadline = time.monotonic() + self.timeout
+            while pending:
+                try:
+                    result_job, i, chunk_scores, err = self.results.get(timeout=1.0)
+                except queue.Empty:
+                    self._check_alive()
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"[RerankerPool] No result within {self.timeout}s.")
+                    continue
+                if result_job != job:  # late result of a batch that already failed
+                    continue
+                scores[i] = chunk_scores
+                error = error or err
+                pending -= 1
+        if error:
+            raise RuntimeError(f"[RerankerPool] Worker failed: {error}")
+        return [s for chunk_scores in scores for s in chunk_scores]
+
+    def close(self) -> None:
+        if self in _POOLS:
+            _POOLS.remove(self)
+        for tasks in self.tasks:
+            tasks.put(None)
+        for w in self.workers:
+            w.join(timeout=5)
+            if w.is_alive():
+                w.terminate()
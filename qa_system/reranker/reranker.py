@@ -1,15 +1,45 @@
 # reranker.py
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Union
 from sentence_transformers import CrossEncoder
+import numpy as np
 import torch
+from qa_system.reranker.pool import RerankerPool, note_inference
+from qa_system.retrieval.candidates import CandidateSet
 from qa_system.utils import Settings
 
 
+def valid_text_mask(texts: np.ndarray) -> np.ndarray:
+    """True where a candidate has non-empty text to score."""
+    return np.array([isinstance(t, str) and bool(t.strip()) for t in texts], dtype=bool)
+
+
+def rerank_dicts(rerank: Callable[[CandidateSet], CandidateSet], docs: List[Dict]) -> List[Dict]:
+    """
+    Apply a CandidateSet reranker to a caller's list of dicts. Returns copies of
+    the caller's dicts (all their keys kept) in ranked order, with
+    'reranker_score' added where one was computed.
+    """
+    parsed = CandidateSet.from_dicts(docs)
+    # list positions as ids, so every ranked row maps back to its original dict
+    candidates = CandidateSet(
+        np.arange(len(docs)).astype(str), parsed.retriever_scores,
+        reranker_scores=parsed.reranker_scores, query_idx=parsed.query_idx, texts=parsed.texts,
+    )
+    ranked = rerank(candidates)
+    out = []
+    for i, score in zip(ranked.doc_ids.astype(int).tolist(), ranked.reranker_scores.tolist()):
+        doc = dict(docs[i])
+        if score == score:  # not NaN
+            doc["reranker_score"] = score
+        out.append(doc)
+    return out
+
+
 class Reranker:
     """
     Cross-encoder reranker using configurable model from Settings.
-    Accepts a list of docs (dicts with at least 'text'/'chunk') and returns
-    the same docs sorted by reranker_score (descending).
+    Accepts a CandidateSet (or a list of dicts with at least 'text'/'chunk')
+    and returns the candidates sorted by reranker_score (descending).
     """
 
     def __init__(
@@ -21,19 +51,51 @@ class Reranker:
         max_len: Optional[int] = None,
     ) -> None:
         cfg = Settings()
-        
+
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.batch_size = batch_size or cfg.reranker_batch_size
-        model_name = model_name or cfg.reranker_model_name
+        self.model_name = model_name or cfg.reranker_model_name
+        self.max_len = max_len
 
-        self.reranker = CrossEncoder(model_name, device=self.device, max_length=max_len)
+        self.reranker = CrossEncoder(self.model_name, device=self.device, max_length=max_len)
 
         # Optional mixed precision for faster inference
-        if (fp16 if fp16 is not None else cfg.reranker_fp16) and self.device.startswith("cuda"):
+        self.fp16 = bool(fp16 if fp16 is not None else cfg.reranker_fp16) and self.device.startswith("cuda")
+        if self.fp16:
             self.reranker.model.half()
 
+        # Optional data-parallel CPU workers, see start_pool
+        self.pool: Optional[RerankerPool] = None
+
+    def config(self) -> Dict:
+        """Settings that change the scores (used to key cached rerank results)."""
+        return {"model_name": self.model_name, "max_len": self.max_len, "fp16": self.fp16}
+
+    def start_pool(self, num_workers: int = None) -> Optional[RerankerPool]:
+        """
+        Fork CPU workers sharing this model (Settings.reranker_num_workers by
+        default). Call once at startup, before anything is scored in-process.
+        """
+        cfg = Settings()
+        num_workers = num_workers or cfg.reranker_num_workers
+        if self.pool is None and num_workers > 1 and self.device == "cpu":
+            self.pool = RerankerPool(
+                self.reranker, num_workers,
+                threads_per_worker=cfg.reranker_threads_per_worker or None,
+                timeout=cfg.reranker_pool_timeout,
+            )
+        return self.pool
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
     def _score_pairs(self, pairs: List[Tuple[str, str]]) -> List[float]:
         """Compute relevance scores for (query, passage) pairs."""
+        if self.pool is not None:
+            return self.pool.score(pairs, batch_size=self.batch_size)
+        note_inference()
         try:
             scores = self.reranker.predict(pairs, batch_size=self.batch_size)
             return [float(s) for s in scores]
@@ -43,42 +105,38 @@ class Reranker:
                 torch.cuda.empty_cache()
             raise
 
-    def rerank(self, query: str, docs: List[Dict], top_k: int = None) -> List[Dict]:
-        """Attach reranker scores and return docs sorted by them."""
+    def rerank(self, query: str, docs: Union[CandidateSet, List[Dict]], top_k: int = None) -> Union[CandidateSet, List[Dict]]:
+        """
+        Score candidates with the cross-encoder and return the top_k by score.
+
+        Takes a CandidateSet (returns a new one with reranker scores) or, for
+        direct callers, a list of dicts (returns copies of them with
+        'reranker_score' added). Input is not modified.
+        """
         cfg = Settings()
         if top_k is None:
             top_k = cfg.rerank_top_k
-            
-        if not docs:
+
+        if isinstance(docs, CandidateSet):
+            return self.rerank_candidates(query, docs, top_k)
+        return rerank_dicts(lambda c: self.rerank_candidates(query, c, top_k), docs)
+
+    def rerank_candidates(self, query: str, candidates: CandidateSet, top_k: int) -> CandidateSet:
+        if len(candidates) == 0:
             print("[Reranker] Warning: received empty doc list.")
-            return []
+            return candidates
 
         # Extract valid text fields
-        texts, idxs = [], []
-        for i, d in enumerate(docs):
-            t = d.get("text") or d.get("chunk") or d.get("content")
-            if isinstance(t, str) and t.strip():
-                texts.append(t)
-                idxs.append(i)
-
-        if not texts:
+        texts = candidates.texts
+        valid = valid_text_mask(texts)
+        if not valid.any():
             print("[Reranker] Warning: no valid text fields found.")
-            return docs[:top_k]
+            return candidates.head(top_k)
 
         # Build (query, doc_text) pairs
-        pairs = [(query, t) for t in texts]
-        scores = self._score_pairs(pairs)
-
-        # Attach scores
-        for i, s in zip(idxs, scores):
-            docs[i]["reranker_score"] = s
-            
-        # Sort docs by score descending
-        docs_sorted = sorted(
-            docs,
-            key=lambda d: d.get("reranker_score", d.get("retriever_score", 0.0)),
-            reverse=True,
-        )
-
-        # Return top_k
-        return docs_sorted[:top_k]
+        pairs = [(query, t) for t in texts[valid]]
+        scores = candidates.reranker_scores.copy()
+        scores[valid] = self._score_pairs(pairs)
+
+        # Sort by score descending and return top_k
+        return candidates.with_reranker_scores(scores).top_k(top_k)
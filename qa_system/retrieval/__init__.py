@@ -1,4 +1,5 @@
 from .retriever import Retriever
+from .candidates import CandidateSet
+from .index_store import IndexBuildOptions, IndexManifest, IndexStore
 
-__all__ = ["Retriever"]
-
+__all__ = ["Retriever", "CandidateSet", "IndexBuildOptions", "IndexManifest", "IndexStore"]
@@ -0,0 +1,192 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+import numpy as np
+
+
+MISSING_TEXT = "<text not found>"
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (ties keep their original order)."""
+    n = len(scores)
+    if k >= n:
+        part = np.arange(n)
+    else:
+        part = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.arange(0)
+    # sort the selection by (-score, position) for a stable order
+    return part[np.lexsort((part, -scores[part]))]
+
+
+class CandidateSet:
+    """
+    Columnar list of retrieval candidates passed between retriever, reranker
+    and pipeline.
+
+    Doc ids, retriever / reranker scores (NaN = not reranked) and the index of
+    the query that retrieved each candidate are numpy arrays. Texts are looked
+    up lazily from the document store and only when a stage needs them.
+    Operations return new sets; nothing is modified in place. Use
+    `to_dicts()` for the list-of-dicts view at the API boundary.
+    """
+
+    def __init__(
+        self,
+        doc_ids: Sequence[str],
+        retriever_scores: Sequence[float],
+        reranker_scores: Optional[Sequence[float]] = None,
+        query_idx: Optional[Sequence[int]] = None,
+        store: Optional[Mapping[str, str]] = None,
+        texts: Optional[Sequence[str]] = None,
+    ) -> None:
+        n = len(doc_ids)
+        self.doc_ids = np.asarray(doc_ids, dtype=str) if n else np.empty(0, dtype="U32")
+        self.retriever_scores = np.asarray(retriever_scores, dtype=np.float32)
+        self.reranker_scores = (
+            np.full(n, np.nan, dtype=np.float32) if reranker_scores is None
+            else np.asarray(reranker_scores, dtype=np.float32)
+        )
+        self.query_idx = (
+            np.zeros(n, dtype=np.int16) if query_idx is None
+            else np.asarray(query_idx, dtype=np.int16)
+        )
+        self.store = store
+        self._texts: Optional[np.ndarray] = None if texts is None else np.asarray(texts, dtype=object)
+
+    # ---- construction ----
+
+    @classmethod
+    def empty(cls, store: Optional[Mapping[str, str]] = None) -> "CandidateSet":
+        return cls([], [], store=store)
+
+    @classmethod
+    def from_results(cls, all_results: Iterable[List[Dict]], store: Optional[Mapping[str, str]] = None) -> "CandidateSet":
+        """From pylate's per-query result lists ({'id', 'score'} dicts)."""
+        doc_ids, scores, query_idx = [], [], []
+        for q, query_results in enumerate(all_results):
+            for result in query_results:
+                doc_ids.append(result["id"])
+                scores.append(result.get("score", 0.0))
+                query_idx.append(q)
+        return cls(doc_ids, scores, query_idx=query_idx, store=store)
+
+    @classmethod
+    def from_dicts(cls, docs: List[Dict], store: Optional[Mapping[str, str]] = None) -> "CandidateSet":
+        """From the list-of-dicts format (at least a 'text'/'chunk'/'content' field)."""
+        return cls(
+            [str(d.get("id", "")) for d in docs],
+            [d.get("retriever_score", 0.0) for d in docs],
+            reranker_scores=[d.get("reranker_score", np.nan) for d in docs],
+            query_idx=[d.get("query_idx", 0) for d in docs],
+            store=store,
+            texts=[d.get("text") or d.get("chunk") or d.get("content") or "" for d in docs],
+        )
+
+    @classmethod
+    def from_record(cls, record: Dict, store: Optional[Mapping[str, str]] = None) -> "CandidateSet":
+        """Inverse of `to_record`; texts are looked up from `store` again."""
+        return cls(
+            record["doc_ids"],
+            record["retriever_scores"],
+            reranker_scores=[np.nan if s is None else s for s in record["reranker_scores"]],
+            query_idx=record["query_idx"],
+            store=store,
+        )
+
+    @staticmethod
+    def concat(sets: Sequence["CandidateSet"]) -> "CandidateSet":
+        sets = [s for s in sets if s is not None]
+        if not sets:
+            return CandidateSet.empty()
+        texts = None
+        if all(s._texts is not None for s in sets) or not all(s.store is not None for s in sets):
+            texts = np.concatenate([s.texts for s in sets])
+        return CandidateSet(
+            np.concatenate([s.doc_ids for s in sets]),
+            np.concatenate([s.retriever_scores for s in sets]),
+            reranker_scores=np.concatenate([s.reranker_scores for s in sets]),
+            query_idx=np.concatenate([s.query_idx for s in sets]),
+            store=sets[0].store,
+            texts=texts,
+        )
+
+    # ---- access ----
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def texts(self) -> np.ndarray:
+        """Candidate texts, resolved from the document store on first access."""
+        if self._texts is None:
+            get = self.store.get if self.store is not None else (lambda _, default: default)
+            self._texts = np.array([get(d, MISSING_TEXT) for d in self.doc_ids.tolist()], dtype=object)
+        return self._texts
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Reranker score where available, retriever score otherwise."""
+        return np.where(np.isnan(self.reranker_scores), self.retriever_scores, self.reranker_scores)
+
+    def take(self, idx: np.ndarray) -> "CandidateSet":
+        idx = np.asarray(idx, dtype=np.int64)
+        return CandidateSet(
+            self.doc_ids[idx],
+            self.retriever_scores[idx],
+            reranker_scores=self.reranker_scores[idx],
+            query_idx=self.query_idx[idx],
+            store=self.store,
+            texts=None if self._texts is None else self._texts[idx],
+        )
+
+    def head(self, k: int) -> "CandidateSet":
+        """First k candidates in their current order."""
+        return self.take(np.arange(min(k, len(self))))
+
+    def top_k(self, k: int, by: str = "score") -> "CandidateSet":
+        """Best k candidates, sorted descending by 'retriever' or combined 'score'."""
+        scores = self.retriever_scores if by == "retriever" else self.scores
+        return self.take(top_indices(scores, k))
+
+    def dedup(self) -> "CandidateSet":
+        """Keep one entry per doc id, the one with the highest retriever score."""
+        if len(self) == 0:
+            return self
+        order = np.argsort(-self.retriever_scores, kind="stable")
+        _, first = np.unique(self.doc_ids[order], return_index=True)
+        return self.take(order[np.sort(first)])
+
+    def contains(self, doc_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask over `doc_ids` of the ids present in this set."""
+        return np.isin(doc_ids, self.doc_ids)
+
+    def with_reranker_scores(self, scores: np.ndarray) -> "CandidateSet":
+        out = self.take(np.arange(len(self)))
+        out.reranker_scores = np.asarray(scores, dtype=np.float32)
+        return out
+
+    def with_query_offset(self, offset: int) -> "CandidateSet":
+        """Same candidates with query_idx shifted, for results of a later batch of queries."""
+        out = self.take(np.arange(len(self)))
+        out.query_idx = (self.query_idx + offset).astype(np.int16)
+        return out
+
+    def to_record(self) -> Dict:
+        """JSON-serialisable columns without texts (NaN reranker scores become None)."""
+        return {
+            "doc_ids": self.doc_ids.tolist(),
+            "retriever_scores": self.retriever_scores.tolist(),
+            "reranker_scores": [None if s != s else s for s in self.reranker_scores.tolist()],
+            "query_idx": self.query_idx.tolist(),
+        }
+
+    def to_dicts(self) -> List[Dict]:
+        """List-of-dicts view: text, id, retriever_score and reranker_score when scored."""
+        docs = []
+        for doc_id, text, r_score, rr_score in zip(
+            self.doc_ids.tolist(), self.texts.tolist(),
+            self.retriever_scores.tolist(), self.reranker_scores.tolist(),
+        ):
+            d = {"text": text, "id": doc_id, "retriever_score": r_score}
+            if rr_score == rr_score:  # not NaN
+                d["reranker_score"] = rr_score
+            docs.append(d)
+        return docs
@@ -0,0 +1,151 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+
+
+DOC_TABLE_DIR = "doc_table"
+
+
+def group_documents_by_title(dataset: Iterable[Dict]) -> List[Tuple[str, str, str, int]]:
+    """
+    Unique "title: sentence" documents from HotpotQA entries as
+    (doc_id, doc, title, sent_idx), grouped so that every title's sentences
+    are contiguous. doc_id is the md5 of the document text, as in the index.
+    """
+    by_title: Dict[str, List[Tuple[str, str, int]]] = {}
+    seen = set()
+    for entry in dataset:
+        for title, sentences in entry["context"]:
+            group = by_title.setdefault(title, [])
+            for idx, sentence in enumerate(sentences):
+                doc = f"{title}: {sentence}"
+                doc_id = hashlib.md5(doc.encode()).hexdigest()
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                group.append((doc_id, doc, idx))
+    return [
+        (doc_id, doc, title, idx)
+        for title, group in by_title.items()
+        for doc_id, doc, idx in group
+    ]
+
+
+class DocumentTable:
+    """
+    Memory-mapped doc_id -> (title, sentence index) table stored with an index.
+
+    Documents are numbered by position; all sentences of a title occupy the
+    contiguous range title_offsets[t]:title_offsets[t + 1]. Lookups by doc_id
+    binary-search a sorted copy of the ids, so nothing is hashed or loaded
+    into Python dicts at startup.
+    """
+
+    def __init__(self, path: str) -> None:
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Document table not found at {path}")
+        self.path = path
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")  # noqa: E731
+        self.doc_ids = load("doc_ids")                  # S32, by position
+        self.sorted_doc_ids = load("sorted_doc_ids")    # S32, sorted
+        self.sorted_positions = load("sorted_positions")
+        self.title_ids = load("title_ids")
+        self.sent_idx = load("sent_idx")
+        self.title_offsets = load("title_offsets")
+        with open(os.path.join(path, "titles.json"), "r") as f:
+            self.titles: List[str] = json.load(f)
+        self._title_to_id: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @staticmethod
+    def write(path: str, documents: Sequence[Tuple[str, str, str, int]]) -> None:
+        """Persist a table for title-grouped (doc_id, doc, title, sent_idx) rows."""
+        os.makedirs(path, exist_ok=True)
+        titles: List[str] = []
+        title_ids = np.empty(len(documents), dtype=np.int32)
+        sent_idx = np.empty(len(documents), dtype=np.int32)
+        offsets = [0]
+        for pos, (_, _, title, idx) in enumerate(documents):
+            if not titles or titles[-1] != title:
+                if titles:
+                    offsets.append(pos)
+                titles.append(title)
+            title_ids[pos] = len(titles) - 1
+            sent_idx[pos] = idx
+        offsets.append(len(documents))
+
+        doc_ids = np.array([d[0] for d in documents], dtype="S32")
+        order = np.argsort(doc_ids, kind="stable").astype(np.int32)
+        arrays = {
+            "doc_ids": doc_ids,
+            "sorted_doc_ids": doc_ids[order],
+            "sorted_positions": order,
+            "title_ids": title_ids,
+            "sent_idx": sent_idx,
+            "title_offsets": np.array(offsets if documents else [0], dtype=np.int64),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), arr)
+        with open(os.path.join(path, "titles.json"), "w") as f:
+            json.dump(titles, f)
+
+    def positions(self, doc_ids: Sequence[str]) -> np.ndarray:
+        """Positions of the given doc ids, -1 where an id is unknown."""
+        keys = np.array(doc_ids, dtype="S32")
+        if len(self) == 0 or len(keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        found = np.searchsorted(self.sorted_doc_ids, keys)
+        found = np.minimum(found, len(self) - 1)
+        hit = self.sorted_doc_ids[found] == keys
+        return np.where(hit, self.sorted_positions[found], -1).astype(np.int64)
+
+    def lookup_sp(self, doc_ids: Sequence[str]) -> List[List]:
+        """[title, sent_id] supporting facts for doc ids (unknown ids are skipped)."""
+        pos = self.positions(doc_ids)
+        pos = pos[pos >= 0]
+        return [[self.titles[t], int(s)] for t, s in zip(self.title_ids[pos], self.sent_idx[pos])]
+
+    def lookup(self, doc_id: str) -> Optional[Tuple[str, int]]:
+        pos = int(self.positions([doc_id])[0])
+        if pos < 0:
+            return None
+        return self.titles[self.title_ids[pos]], int(self.sent_idx[pos])
+
+    def title_id(self, title: str) -> Optional[int]:
+        if self._title_to_id is None:
+            self._title_to_id = {t: i for i, t in enumerate(self.titles)}
+        return self._title_to_id.get(title)
+
+    def paragraph_doc_ids(self, title: str) -> List[str]:
+        """All doc ids of a title's paragraph, in position order."""
+        t = self.title_id(title)
+        if t is None:
+            return []
+        start, end = self.title_offsets[t], self.title_offsets[t + 1]
+        return [d.decode() for d in self.doc_ids[start:end]]
+
+    def paragraph_of(self, doc_ids: Sequence[str]) -> List[str]:
+        """Doc ids of every paragraph that contains one of `doc_ids` (deduplicated, in order)."""
+        pos = self.positions(doc_ids)
+        title_ids = dict.fromkeys(int(t) for t in self.title_ids[pos[pos >= 0]])
+        out: List[str] = []
+        for t in title_ids:
+            start, end = self.title_offsets[t], self.title_offsets[t + 1]
+            out.extend(d.decode() for d in self.doc_ids[start:end])
+        return out
+
+
+if __name__ == "__main__":
+    # Build a table for an index that predates the versioned layout:
+    # python -m qa_system.retrieval.doc_table qa_system/data/hotpot_dev_fullwiki_v1.json
+    from qa_system.data import HotpotQADataset
+
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(__file__), DOC_TABLE_DIR)
+    documents = group_documents_by_title(HotpotQADataset(sys.argv[1]).iter_raw())
+    DocumentTable.write(out_dir, documents)
+    print(f"[DocumentTable] Wrote {len(documents)} documents to {out_dir}")
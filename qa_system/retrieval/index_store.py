@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field
+import hashlib
+import json
+import os
+
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+DOCUMENT_MAP_FILE = "document_ids_to_sentence.json"
+PLAID_DIR = "fast_plaid_index"
+
+
+class IndexBuildOptions(BaseModel):
+    """Compression / pruning knobs for building a PLAID index (see Settings.index_*)."""
+    # bits per residual dimension in PLAID (1, 2, 4 or 8). This is the only storage
+    # precision knob: fast_plaid always stores nbits residuals, so there is no
+    # separate float16 / int8 embedding tier
+    nbits: int = 4
+    # merge similar document tokens (pylate token pooling); 1 keeps every token
+    pool_factor: int = 1
+    # skip stopword tokens in documents, on top of pylate's default punctuation skiplist
+    prune_stopwords: bool = False
+    # drop the lowest-norm fraction of each document's tokens before normalization
+    low_norm_quantile: float = 0.0
+
+
+class IndexManifest(BaseModel):
+    """Metadata describing one built version of the PLAID index."""
+    version: str
+    model_name: str
+    num_documents: int
+    built_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    checksum: str = ""
+    build_options: Dict = Field(default_factory=dict)
+
+
+class IndexStore:
+    """
+    Versioned on-disk layout for PLAID indexes:
+
+        <index_folder>/<index_name>/
+            CURRENT                          # name of the active version
+            versions/<version>/
+                manifest.json
+                document_ids_to_sentence.json
+                fast_plaid_index/...
+
+    A version is built into its own directory and only becomes visible to
+    retrievers once `publish` atomically rewrites CURRENT.
+    """
+
+    def __init__(self, index_folder: str, index_name: str) -> None:
+        self.root = os.path.join(index_folder, index_name)
+        self.versions_dir = os.path.join(self.root, VERSIONS_DIR)
+
+    @staticmethod
+    def new_version() -> str:
+        """Version names sort chronologically (microseconds, so back-to-back builds don't collide)."""
+        return datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self) -> List[str]:
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            v for v in os.listdir(self.versions_dir)
+            if os.path.exists(os.path.join(self.versions_dir, v, MANIFEST_FILE))
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Return the published version, or None for the legacy flat layout."""
+        path = os.path.join(self.root, CURRENT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            version = f.read().strip()
+        return version or None
+
+    def current_mtime(self) -> Optional[int]:
+        """Modification time of CURRENT (ns), or None without one; cheap enough to check per query."""
+        try:
+            return os.stat(os.path.join(self.root, CURRENT_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load_manifest(self, version: str) -> IndexManifest:
+        path = os.path.join(self.version_dir(version), MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Manifest not found at {path}")
+        with open(path, "r") as f:
+            return IndexManifest(**json.load(f))
+
+    def write_manifest(self, manifest: IndexManifest) -> None:
+        path = os.path.join(self.version_dir(manifest.version), MANIFEST_FILE)
+        _atomic_write(path, manifest.model_dump_json(indent=2))
+
+    def checksum(self, version: str) -> str:
+        """sha256 over every file of a version except its manifest."""
+        base = self.version_dir(version)
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, base)
+                if rel == MANIFEST_FILE:
+                    continue
+                digest.update(rel.encode())
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    def verify(self, version: str) -> bool:
+        """True if the version's files match the checksum recorded in its manifest."""
+        return self.checksum(version) == self.load_manifest(version).checksum
+
+    def publish(self, version: str) -> None:
+        """Make `version` the one new and running retrievers pick up."""
+        self.load_manifest(version)
+        _atomic_write(os.path.join(self.root, CURRENT_FILE), version)
+
+
+def _atomic_write(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
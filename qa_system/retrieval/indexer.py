@@ -0,0 +1,124 @@
+from typing import Dict, Iterable, List, Optional
+from pylate import models, indexes
+import numpy as np
+import string
+from qa_system.retrieval.doc_table import DocumentTable, group_documents_by_title, DOC_TABLE_DIR
+from qa_system.retrieval.index_store import (
+    IndexBuildOptions,
+    IndexManifest,
+    IndexStore,
+    DOCUMENT_MAP_FILE,
+)
+from qa_system.utils import Settings
+import json
+import os
+
+
+STOPWORDS = (
+    "a an the and or but of to in on at by for with from as is was were are be been "
+    "being it its this that these those he she they his her their which who whom whose"
+).split()
+
+
+def default_build_options(cfg: Settings) -> IndexBuildOptions:
+    return IndexBuildOptions(
+        nbits=cfg.index_nbits,
+        pool_factor=cfg.index_pool_factor,
+        prune_stopwords=cfg.index_prune_stopwords,
+        low_norm_quantile=cfg.index_low_norm_quantile,
+    )
+
+
+def prune_low_norm(embeddings: np.ndarray, quantile: float, min_tokens: int = 4) -> np.ndarray:
+    """
+    Drop a document's lowest-norm token embeddings (they contribute little to
+    MaxSim) and L2-normalize the rest.
+    """
+    norms = np.linalg.norm(embeddings, axis=1)
+    if quantile > 0 and len(embeddings) > min_tokens:
+        keep = norms >= np.quantile(norms, quantile)
+        if keep.sum() < min_tokens:
+            keep = np.zeros(len(norms), dtype=bool)
+            keep[np.argsort(norms)[-min_tokens:]] = True
+        embeddings, norms = embeddings[keep], norms[keep]
+    return embeddings / np.maximum(norms, 1e-12)[:, None]
+
+
+def encode_documents(model, documents: List[str], options: IndexBuildOptions, batch_size: int) -> List[np.ndarray]:
+    """Encode documents with the token pooling / pruning in `options`."""
+    embeddings = model.encode(
+        documents,
+        batch_size=batch_size,
+        is_query=False,
+        show_progress_bar=True,
+        pool_factor=options.pool_factor,
+        # low-norm pruning needs the raw norms, so normalize after pruning
+        normalize_embeddings=options.low_norm_quantile <= 0,
+    )
+    if options.low_norm_quantile > 0:
+        embeddings = [prune_low_norm(np.asarray(e), options.low_norm_quantile) for e in embeddings]
+    return list(embeddings)
+
+
+def build_index(
+    dataset: Iterable[Dict],
+    version: Optional[str] = None,
+    publish: bool = True,
+    batch_size: int = 32,
+    cfg: Optional[Settings] = None,
+    options: Optional[IndexBuildOptions] = None,
+) -> IndexManifest:
+    """
+    Build a new PLAID index version from HotpotQA entries.
+
+    The version is written next to the existing ones and, if `publish` is set,
+    becomes current once it is complete; running retrievers switch to it on
+    their next query. `options` (default: the Settings.index_* values) control
+    residual bits, token pooling, stopword pruning and low-norm token pruning,
+    and are recorded in the manifest.
+    """
+    cfg = cfg or Settings()
+    options = options or default_build_options(cfg)
+    store = IndexStore(cfg.index_folder, cfg.index_name)
+    version = version or store.new_version()
+    version_dir = store.version_dir(version)
+    if os.path.exists(version_dir):
+        raise FileExistsError(f"Index version already exists at {version_dir}")
+
+    # title-grouped so each paragraph is a contiguous range in the document table
+    rows = group_documents_by_title(dataset)
+    documents_ids = [r[0] for r in rows]
+    documents = [r[1] for r in rows]
+    print(f"[Indexer] Building version {version} with {len(documents)} documents")
+
+    skiplist = list(string.punctuation) + (STOPWORDS if options.prune_stopwords else [])
+    model = models.ColBERT(model_name_or_path=cfg.model_name, skiplist_words=skiplist)
+    index = indexes.PLAID(
+        index_folder=store.versions_dir,
+        index_name=version,
+        override=True,
+        nbits=options.nbits,
+    )
+    documents_embeddings = encode_documents(model, documents, options, batch_size)
+    index.add_documents(
+        documents_ids=documents_ids,
+        documents_embeddings=documents_embeddings,
+    )
+
+    with open(os.path.join(version_dir, DOCUMENT_MAP_FILE), "w") as f:
+        json.dump(dict(zip(documents_ids, documents)), f)
+    DocumentTable.write(os.path.join(version_dir, DOC_TABLE_DIR), rows)
+
+    manifest = IndexManifest(
+        version=version,
+        model_name=cfg.model_name,
+        num_documents=len(documents),
+        build_options=options.model_dump(),
+    )
+    manifest.checksum = store.checksum(version)
+    store.write_manifest(manifest)
+
+    if publish:
+        store.publish(version)
+        print(f"[Indexer] Published version {version}")
+    return manifest
@@ -1,96 +1,269 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+from contextlib import contextmanager
 from pylate import models, indexes, retrieve
+from qa_system.retrieval.index_store import IndexManifest, IndexStore, DOCUMENT_MAP_FILE
+from qa_system.retrieval.doc_table import DocumentTable, DOC_TABLE_DIR
+from qa_system.retrieval.candidates import CandidateSet
 from qa_system.utils import Settings
 import os
 import json
+import threading
+import numpy as np
+
+
+class _IndexHandle:
+    """One loaded index version; retired once no query holds a reference to it."""
+
+    def __init__(self, version: Optional[str], manifest: Optional[IndexManifest], index, retriever, model, document_ids_to_sentence: Dict[str, str], document_table: Optional[DocumentTable]) -> None:
+        self.version = version
+        self.manifest = manifest
+        self.index = index
+        self.retriever = retriever
+        self.model = model
+        self.document_ids_to_sentence = document_ids_to_sentence
+        self.document_table = document_table
+        self.refs = 0
+        self.retired = False
+
+    def close(self) -> None:
+        self.index = None
+        self.retriever = None
+        self.model = None
+        self.document_ids_to_sentence = None
+        self.document_table = None
 
 
 class Retriever:
-    def __init__(self) -> None:
-        self.cfg = Settings()
+    def __init__(self, cfg: Optional[Settings] = None) -> None:
+        self.cfg = cfg or Settings()
+        self.store = IndexStore(self.cfg.index_folder, self.cfg.index_name)
+        self._lock = threading.Lock()
+        # CURRENT as of the loaded version; a newer one triggers a background swap
+        self._current_mtime = self.store.current_mtime()
+        self._reloading = False
+        self._handle = self._load_handle(self.cfg.index_version or self.store.current_version())
 
-        # Initialize PLAID index (use existing index)
-        self.index = indexes.PLAID(
-            index_folder=self.cfg.index_folder,
-            index_name=self.cfg.index_name,
-            override=False,
-            device="cpu"
+    @property
+    def index_version(self) -> Optional[str]:
+        """Version of the index new queries run against (None for the legacy layout)."""
+        return self._handle.version
 
-        )
+    @property
+    def model(self):
+        return self._handle.model
 
-        # Initialize the retriever
-        self.retriever = retrieve.ColBERT(index=self.index)
+    @property
+    def document_ids_to_sentence(self) -> Dict[str, str]:
+        return self._handle.document_ids_to_sentence
 
-        # Initialize ColBERT model
-        self.model = self._init_model()
+    @property
+    def document_table(self) -> Optional[DocumentTable]:
+        """doc_id -> [title, sent_id] table shipped with the index, if it was built with one."""
+        return self._handle.document_table
 
-        # Load document_id -> text mapping from JSON
-        self.document_ids_to_sentence = self._load_document_ids_to_sentence()
+    def config(self) -> Dict:
+        """Identity of the index queries currently run against (used to key cached results)."""
+        handle = self._handle
+        return {
+            "model_name": self._model_name(handle),
+            "index_folder": self.cfg.index_folder,
+            "index_name": self.cfg.index_name,
+            "index_version": handle.version,
+            "checksum": handle.manifest.checksum if handle.manifest else None,
+        }
 
-    def _init_model(self):
-        """Initialize ColBERT model using Settings().model_name."""
-        if not hasattr(self.cfg, "model_name") or not self.cfg.model_name:
+    def _init_model(self, model_name: str):
+        """Initialize ColBERT model from a model path or name."""
+        if not model_name:
             raise RuntimeError(
                 "Settings().model_name is not set. Provide a valid ColBERT model path or name."
             )
-        model = models.ColBERT(model_name_or_path=self.cfg.model_name)
+        model = models.ColBERT(model_name_or_path=model_name)
         if model is None:
             raise RuntimeError(
-                f"Failed to load ColBERT model from '{self.cfg.model_name}'."
+                f"Failed to load ColBERT model from '{model_name}'."
             )
         return model
 
-    def _load_document_ids_to_sentence(self) -> Dict[str, str]:
+    def _load_handle(self, version: Optional[str], verify: bool = False) -> _IndexHandle:
+        """
+        Load the PLAID index, ColBERT model and id -> text map for a version.
+        `verify` checksums every file of the version first (used when swapping;
+        the version picked at startup trusts its manifest).
+        """
+        if version is None:
+            # Legacy flat layout: <index_folder>/<index_name>/fast_plaid_index
+            manifest = None
+            index_folder, index_name = self.cfg.index_folder, self.cfg.index_name
+            json_path = os.path.join(os.path.dirname(__file__), DOCUMENT_MAP_FILE)
+            table_path = os.path.join(os.path.dirname(__file__), DOC_TABLE_DIR)
+            model_name = self.cfg.model_name
+        else:
+            manifest = self.store.load_manifest(version)
+            # never swap to a partially copied or corrupted version
+            if verify and not self.store.verify(version):
+                raise RuntimeError(f"Index version {version} does not match its manifest checksum.")
+            index_folder, index_name = self.store.versions_dir, version
+            json_path = os.path.join(self.store.version_dir(version), DOCUMENT_MAP_FILE)
+            table_path = os.path.join(self.store.version_dir(version), DOC_TABLE_DIR)
+            model_name = manifest.model_name
+
+        # Initialize PLAID index (use existing index)
+        index = indexes.PLAID(
+            index_folder=index_folder,
+            index_name=index_name,
+            override=False,
+            device="cpu"
+
+        )
+
+        # Reuse the loaded ColBERT model when the new version was built with the same one
+        current = getattr(self, "_handle", None)
+        if current is not None and current.model is not None and self._model_name(current) == model_name:
+            model = current.model
+        else:
+            model = self._init_model(model_name)
+
+        return _IndexHandle(
+            version=version,
+            manifest=manifest,
+            index=index,
+            retriever=retrieve.ColBERT(index=index),
+            model=model,
+            document_ids_to_sentence=self._load_document_ids_to_sentence(json_path),
+            document_table=DocumentTable(table_path) if os.path.isdir(table_path) else None,
+        )
+
+    def _model_name(self, handle: _IndexHandle) -> str:
+        return handle.manifest.model_name if handle.manifest else self.cfg.model_name
+
+    def _load_document_ids_to_sentence(self, json_path: str) -> Dict[str, str]:
         """Load document ID -> text mapping from JSON file."""
-        json_path = os.path.join(os.path.dirname(__file__), "document_ids_to_sentence.json")
         if not os.path.exists(json_path):
             raise FileNotFoundError(f"Mapping file not found at {json_path}")
         with open(json_path, "r") as f:
             data = json.load(f)
         return data
 
-    def retrieve(self, query: str, top_k: int = None) -> List[Dict]:
+    def _check_current(self) -> None:
+        """Start a background swap when CURRENT has been republished (a pinned index_version is never followed)."""
+        if self.cfg.index_version:
+            return
+        mtime = self.store.current_mtime()
+        with self._lock:
+            if mtime == self._current_mtime or self._reloading:
+                return
+            self._current_mtime = mtime
+            self._reloading = True
+        self.reload()
+
+    @contextmanager
+    def _acquire(self):
+        """Pin the current index for the duration of one query."""
+        self._check_current()
+        with self._lock:
+            handle = self._handle
+            handle.refs += 1
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                handle.refs -= 1
+                release = handle.retired and handle.refs == 0
+            if release:
+                handle.close()
+
+    def swap(self, version: Optional[str] = None) -> Optional[str]:
+        """
+        Load `version` (default: the published one) and atomically switch to it.
+
+        Queries already running keep using the old index; it is released when
+        the last of them finishes. Returns the version now in use.
+        """
+        version = version or self.store.current_version()
+        if version == self.index_version:
+            return version
+        new_handle = self._load_handle(version, verify=True)
+
+        with self._lock:
+            old_handle = self._handle
+            self._handle = new_handle
+            old_handle.retired = True
+            release = old_handle.refs == 0
+        if release:
+            old_handle.close()
+        print(f"[Retriever] Switched index {old_handle.version} -> {new_handle.version}")
+        return new_handle.version
+
+    def reload(self, version: Optional[str] = None) -> threading.Thread:
+        """
+        Run `swap` in a background thread so serving continues while the new
+        index loads. Called automatically when a query sees CURRENT change.
+        """
+        thread = threading.Thread(target=self._swap_in_background, args=(version,), daemon=True)
+        thread.start()
+        return thread
+
+    def _swap_in_background(self, version: Optional[str]) -> None:
+        try:
+            self.swap(version)
+        except Exception as e:
+            # keep serving the old index; the next publish retries
+            print(f"[Retriever] Reload failed, still serving {self.index_version}: {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def retrieve(self, query: str, top_k: int = None) -> CandidateSet:
         """Retrieve the top_k most relevant documents for a given query."""
         if top_k is None:
             top_k = self.cfg.retrieval_top_k
         return self.retrieve_multiple([query], top_k)
-    
-    def retrieve_multiple(self, queries: List[str], top_k: int = None) -> List[Dict]:
-        """Retrieve documents for multiple queries and merge results."""
+
+    def retrieve_multiple(self, queries: List[str], top_k: int = None, max_candidates: Optional[int] = None) -> CandidateSet:
+        """
+        Retrieve top_k documents per query and merge them, keeping the best
+        `max_candidates` (default top_k) of the deduplicated union.
+        """
         if top_k is None:
             top_k = self.cfg.retrieval_top_k
-        if self.model is None:
-            raise RuntimeError("Model not initialized properly.")
-
-        # Encode all queries
-        query_emb = self.model.encode(
-            queries,
-            is_query=True,
-            show_progress_bar=False
-        )
 
-        # Retrieve top-k results for each query
-        all_results = self.retriever.retrieve(queries_embeddings=query_emb, k=top_k)
-
-        
-        merged_contexts = []
-        
-        for query_results in all_results:
-            for result in query_results:
-                doc_id = result["id"]
-                text = self.document_ids_to_sentence.get(doc_id, "<text not found>")
-                merged_contexts.append({
-                    "text": text,
-                    "id": doc_id,
-                    "retriever_score": result.get("score", 0.0)
-                })
-
-        # Sort by score and return top_k
-        merged_contexts.sort(key=lambda x: x["retriever_score"], reverse=True) 
-        return merged_contexts[:top_k]
+        with self._acquire() as handle:
+            if handle.model is None:
+                raise RuntimeError("Model not initialized properly.")
+
+            # Encode all queries
+            query_emb = handle.model.encode(
+                queries,
+                is_query=True,
+                show_progress_bar=False
+            )
+
+            # Retrieve top-k results for each query
+            all_results = handle.retriever.retrieve(queries_embeddings=query_emb, k=top_k)
+
+            # texts are resolved lazily from this version's document store
+            candidates = CandidateSet.from_results(all_results, store=handle.document_ids_to_sentence)
+
+        return self.merge([candidates], max_candidates or top_k)
+
+    @staticmethod
+    def merge(results: List[CandidateSet], top_k: int) -> CandidateSet:
+        """Merge candidates from separate retrieve calls into one deduplicated top_k set by retriever score."""
+        return CandidateSet.concat(results).dedup().top_k(top_k, by="retriever")
+
+    def expand_paragraphs(self, candidates: CandidateSet) -> CandidateSet:
+        """Add the remaining sentences of every paragraph that a retrieved sentence belongs to."""
+        with self._acquire() as handle:
+            if handle.document_table is None:
+                raise RuntimeError("Paragraph expansion needs an index built with a document table.")
+            doc_ids = np.array(handle.document_table.paragraph_of(candidates.doc_ids), dtype=str)
+            doc_ids = doc_ids[~candidates.contains(doc_ids)]
+            extra = CandidateSet(doc_ids, np.zeros(len(doc_ids)), query_idx=np.full(len(doc_ids), -1), store=handle.document_ids_to_sentence)
+        return CandidateSet.concat([candidates, extra])
 
 if __name__ == "__main__":
     retriever = Retriever()
     results = retriever.retrieve("Were Scott Derrickson and Ed Wood of the same nationality?")  # FYI the answer should not be Abdullah :)
-    for i, r in enumerate(results, 1):
-        print(f"{i}. {r['text']}")
\ No newline at end of file
+    for i, r in enumerate(results.to_dicts(), 1):
+        print(f"{i}. {r['text']}")
@@ -0,0 +1,45 @@
+# a running Retriever follows CURRENT: publishing a version swaps it in on the next query
+# run with: python -m pytest qa_system/retrieval/retriever_test.py
+
+import os
+import time
+
+from qa_system.retrieval import retriever as retriever_module
+from qa_system.retrieval.index_store import IndexManifest, IndexStore
+from qa_system.utils import Settings
+
+
+def _publish(store: IndexStore, version: str) -> None:
+    os.makedirs(store.version_dir(version), exist_ok=True)
+    store.write_manifest(IndexManifest(
+        version=version, model_name="stub", num_documents=0,
+        checksum=store.checksum(version),
+    ))
+    store.publish(version)
+
+
+def test_follows_published_version(tmp_path, monkeypatch):
+    loads = []
+
+    def load_handle(self, version, verify=False):
+        loads.append((version, verify))
+        return retriever_module._IndexHandle(version, None, None, None, None, {}, None)
+
+    monkeypatch.setattr(retriever_module.Retriever, "_load_handle", load_handle)
+    cfg = Settings(index_folder=str(tmp_path), index_name="idx", index_version=None)
+    store = IndexStore(cfg.index_folder, cfg.index_name)
+    _publish(store, "v1")
+
+    retriever = retriever_module.Retriever(cfg)
+    with retriever._acquire() as handle:
+        assert handle.version == "v1"
+
+    time.sleep(0.01)  # distinct CURRENT mtime
+    _publish(store, "v2")
+    with retriever._acquire() as handle:
+        pass  # this query still runs on v1 while v2 loads
+    deadline = time.monotonic() + 5
+    while retriever.index_version != "v2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert retriever.index_version == "v2"
+    assert loads == [("v1", False), ("v2", True)]
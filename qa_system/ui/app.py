@@ -4,7 +4,7 @@
 from functools import lru_cache
 from typing import Tuple
 import gradio as gr
-from qa_system.pipeline.qa_pipeline import build_pipeline
+from qa_system.pipeline.qa_pipeline import build_pipeline, build_reranker
 
 PROJECT_ABSTRACT = """
 **FIRE-QA (Full Interaction Retrieval and Enhanced Question Answering)**
@@ -14,9 +14,13 @@ Question-answering (QA) remains one of the core challenges in Natural Language P
 **FIRE-QA** searches many documents, gathers the pieces of evidence you need, ranks the most relevant parts, and uses an AI model to produce an answer with a clear reasoning trail—all in a simple web app.
 """
 
+# built once at startup and shared by both pipelines: a reranker worker pool
+# (Settings.reranker_num_workers) must be forked before any query is served
+RERANKER = build_reranker()
+
 @lru_cache(maxsize=2)
 def get_pipeline(use_rewriter: bool):
-    return build_pipeline(use_rewriter=use_rewriter)
+    return build_pipeline(use_rewriter=use_rewriter, reranker=RERANKER)
 
 def run_pipeline(question: str, use_rewriter: bool, show_steps: bool, show_sources: bool) -> Tuple[str, str, str]:
     q = (question or "").strip()
@@ -42,12 +46,15 @@ def run_pipeline(question: str, use_rewriter: bool, show_steps: bool, show_sourc
     sources_md = ""
     if show_sources:
         parts = []
+        table = pipe.retriever.document_table if pipe.retriever else None
         for i, d in enumerate(result.get("contexts", []) or [], 1):
             txt = d.get("text") or d.get("chunk") or d.get("content") or ""
             score = d.get("reranker_score", d.get("retriever_score", ""))
             if len(txt) > 1500:
                 txt = txt[:1500] + " …"
-            parts.append(f"**Doc {i}** (score: {score})\n\n{txt}")
+            source = table.lookup(d["id"]) if table is not None and "id" in d else None
+            where = f" — {source[0]}, sentence {source[1]}" if source else ""
+            parts.append(f"**Doc {i}**{where} (score: {score})\n\n{txt}")
         sources_md = "\n\n---\n\n".join(parts)
 
     return answer, steps_md, sources_md
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 import os
 
@@ -12,6 +13,59 @@ class Settings(BaseModel):
     reranker_batch_size: int = 16
     reranker_fp16: bool = True
     reranker_max_len: int = 512
+    # CPU only: >1 splits each batch of pairs across this many forked worker
+    # processes, each pinned to its own core group (0 threads = cores / workers).
+    # The pool is started once at startup by build_reranker (large model only).
+    reranker_num_workers: int = 0
+    reranker_threads_per_worker: int = 0
+    reranker_pool_timeout: float = 120.0
+
+    # fast path: extractive QA / yes-no NLI over the top reranked contexts; answers
+    # at or above the threshold skip the LLM
+    fast_answer: bool = False
+    fast_answer_model: str = "deepset/roberta-base-squad2"
+    fast_answer_yes_no_model: str = "cross-encoder/nli-deberta-v3-base"
+    fast_answer_threshold: float = 0.9
+    fast_answer_top_k: int = 3
+
+    # cascade: a cheap first stage ("colbert" = retriever MaxSim score, or a small
+    # cross-encoder name) keeps a shortlist, and only that goes to reranker_model_name.
+    # It sees the union of every query's retrieval_top_k (up to 4 x 20 with the
+    # rewriter), so the large model scores 12 pairs instead of up to 80.
+    reranker_cascade: bool = False
+    reranker_cascade_first_stage: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_cascade_shortlist: int = 12
+
+    # Prompts are a fixed system message followed by a short user message so that
+    # Ollama / llama.cpp can reuse the cached prefix across requests.
+    llm_model_name: str = "qwen3:0.6b"
+    llm_system_prompt: str = (
+        "You are an advanced RAG-based question-answering agent.\n"
+        "Directly answer the question using the retrieved context.\n\n"
+        "Instructions:\n"
+        "    - Directly state the answer ONLY and nothing more\n"
+        "    - If the context is insufficient, just say “INSUFFICIENT EVIDENCE” and nothing more"
+    )
+    llm_user_template: str = "Retrieved Context:\n{context}\n\nQuestion:\n{question}"
+
+    rewriter_system_prompt: str = (
+        "You are a query decomposition agent that decompose queries to multiple sub-queries.\n\n"
+        "Example:\n"
+        "Question: \"Are the Laleli Mosque and Esma Sultan Mansion located in the same neighborhood?\"\n"
+        "Sub-queries: {\"sub_queries\": [\"What is the neighborhood of the Laleli Mosque?\", "
+        "\"What is the neighborhood of the Esma Sultan Mansion?\"]}\n\n"
+        "Create 2-3 focused queries that target specific entities or concepts mentioned.\n\n"
+        "IMPORTANT: Return ONLY a JSON object of the form {\"sub_queries\": [...]}"
+    )
+    rewriter_user_template: str = "Question: {query}"
+    rewriter_model_name: str = "qwen3:0.6b"
+    rewriter_max_queries: int = 3
+    rewriter_num_predict: int = 128  # generation cap for the JSON sub-query list
+    rewriter_similarity_threshold: float = 0.8  # word-overlap at which a sub-query counts as a duplicate
+
+    # retrieve (and optionally rerank) the original question while the rewriter runs
+    speculative_rewrite: bool = False
+    speculative_rerank: bool = False
 
     # index folder should be a full path relative to repo root
     index_folder: str = os.path.join(
@@ -21,4 +75,12 @@ class Settings(BaseModel):
         "index",
     )
     index_name: str = "hotpotqa-colbert-index"
+    # pin a version under <index_folder>/<index_name>/versions; None follows CURRENT
+    index_version: Optional[str] = None
+
+    # index build options recorded in each version's manifest (see IndexBuildOptions)
+    index_nbits: int = 4
+    index_pool_factor: int = 1
+    index_prune_stopwords: bool = False
+    index_low_norm_quantile: float = 0.0
 